@@ -1,9 +1,11 @@
+import argparse
 from pathlib import Path
 
 import ttkbootstrap as ttk
 
 import src.decryptor_ui as dui
 import src.encryptor_ui as eui
+from src.profiling import add_profile_arguments, configure_profiling
 
 
 class UI(ttk.Frame):
@@ -29,7 +31,12 @@ class UI(ttk.Frame):
         self.tab_control.add(self.decrypt_ui, text="DECRYPT")
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SifrPN desktop app.")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
     app = ttk.Window(
         title="SifrPN: Pixel Noise Encryption/Decryption Tool",
         themename="darkly",
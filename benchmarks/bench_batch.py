@@ -0,0 +1,69 @@
+"""Batch encrypt and decrypt throughput by file size.
+
+Run from the repository root:
+
+    py -m benchmarks.bench_batch
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.batch import BatchRunner
+
+FILE_SIZES = [2_000, 100_000, 1_000_000]
+FILE_COUNT = 40
+WORKERS = [1, 4]
+ROUNDS = 3
+
+
+def time_run(mode: str, sources: list[Path], workers: int) -> float:
+    best = float("inf")
+
+    for _ in range(ROUNDS):
+        with tempfile.TemporaryDirectory() as output_dir:
+            runner = BatchRunner(mode, output_dir, max_workers=workers)
+            start = time.perf_counter()
+            report = runner.run(sources)
+            best = min(best, time.perf_counter() - start)
+
+        if report.failed:
+            raise RuntimeError(f"{report.failed} {mode} items failed.")
+
+    return best
+
+
+def main():
+    print(
+        f"{'file':>10} {'workers':>7} {'encrypt/s':>10} {'ms/item':>8} "
+        f"{'decrypt/s':>10} {'ms/item':>8}"
+    )
+
+    for file_size in FILE_SIZES:
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_dir = Path(work_dir) / "input"
+            bundle_dir = Path(work_dir) / "bundles"
+            input_dir.mkdir()
+
+            for index in range(FILE_COUNT):
+                (input_dir / f"{index:03d}.bin").write_bytes(os.urandom(file_size))
+
+            # bundles for the decrypt runs, written once
+            BatchRunner("encrypt", bundle_dir).run([input_dir])
+            bundles = sorted(bundle_dir.glob("*.zip"))
+
+            for workers in WORKERS:
+                encrypt_seconds = time_run("encrypt", [input_dir], workers)
+                decrypt_seconds = time_run("decrypt", bundles, workers)
+                print(
+                    f"{file_size:>10,} {workers:>7} "
+                    f"{FILE_COUNT / encrypt_seconds:>10.1f} "
+                    f"{encrypt_seconds / FILE_COUNT * 1000:>8.1f} "
+                    f"{FILE_COUNT / decrypt_seconds:>10.1f} "
+                    f"{decrypt_seconds / FILE_COUNT * 1000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
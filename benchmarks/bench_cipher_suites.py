@@ -0,0 +1,55 @@
+"""Encrypt and decrypt throughput and token size per cipher suite.
+
+Run from the repository root:
+
+    py -m benchmarks.bench_cipher_suites
+"""
+
+import os
+import time
+
+from cryptography.fernet import Fernet
+
+from src.ciphers import SUITES
+
+PAYLOAD_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+ROUNDS = 3
+
+
+def best_time(func) -> tuple[bytes, float]:
+    best = float("inf")
+    result = b""
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    return result, best
+
+
+def main():
+    key = Fernet.generate_key()
+
+    print(
+        f"{'payload':>10} {'suite':>18} {'token':>12} "
+        f"{'enc MB/s':>9} {'dec MB/s':>9}"
+    )
+
+    for payload_size in PAYLOAD_SIZES:
+        payload = os.urandom(payload_size)
+
+        for name, suite in SUITES.items():
+            token, encrypt_time = best_time(lambda: suite.encrypt(key, payload))
+            plaintext, decrypt_time = best_time(lambda: suite.decrypt(key, token))
+            assert plaintext == payload
+
+            megabytes = payload_size / 1_000_000
+            print(
+                f"{payload_size:>10} {name:>18} {len(token):>12} "
+                f"{megabytes / encrypt_time:>9.1f} {megabytes / decrypt_time:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
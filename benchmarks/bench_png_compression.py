@@ -0,0 +1,61 @@
+"""Bytes and time trade-off of PNG compress levels for cipher images.
+
+Run from the repository root:
+
+    py -m benchmarks.bench_png_compression
+"""
+
+import io
+import os
+import time
+from base64 import urlsafe_b64encode
+
+import src.utilities as utilities
+
+TOKEN_SIZES = [32, 1_000, 20_000, 100_000, 1_000_000, 5_000_000]
+COMPRESS_LEVELS = [0, 1, 6, 9]
+ROUNDS = 3
+
+
+def time_save(image, compress_level: int) -> tuple[int, float]:
+    best = float("inf")
+    size = 0
+
+    for _ in range(ROUNDS):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        image.save(buffer, format="PNG", compress_level=compress_level)
+        best = min(best, time.perf_counter() - start)
+        size = buffer.tell()
+
+    return size, best
+
+
+def main():
+    padding = utilities.SeededPadding(0)
+
+    print(f"{'token':>10} {'variant':>12} {'level':>5} {'bytes':>12} {'ms':>9}")
+
+    for token_size in TOKEN_SIZES:
+        token = urlsafe_b64encode(os.urandom(token_size))
+        image, _ = utilities.ArrayUtil(token, padding).transform_array_image()
+        resized_image, _, scale_factor = utilities.block_rescale(image)
+        is_noise = utilities.is_noise_image(image)
+
+        for variant, instance_image, factor in (
+            ("default", image, 1),
+            (f"resized x{scale_factor}", resized_image, scale_factor),
+        ):
+            auto_level = utilities.png_compress_level(is_noise, factor)
+
+            for compress_level in COMPRESS_LEVELS:
+                size, seconds = time_save(instance_image, compress_level)
+                marker = " <- auto" if compress_level == auto_level else ""
+                print(
+                    f"{token_size:>10} {variant:>12} {compress_level:>5} "
+                    f"{size:>12,} {seconds * 1000:>9.1f}{marker}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Requests per second and tail latency of the local HTTP service.
+
+Start the service first, then run from the repository root:
+
+    py -m src.service
+    py -m benchmarks.load_test_service --clients 8 --requests 50
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+
+PAYLOAD = ("lorem ipsum dolor sit amet " * 200).encode()
+
+
+def run_client(host, port, path, requests, latencies, errors):
+    # one persistent connection per client
+    connection = http.client.HTTPConnection(host, port)
+
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            connection.request("POST", path, body=PAYLOAD)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+    connection.close()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--format", default="json", choices=["json", "zip"])
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    path = f"/encrypt?format={args.format}"
+
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(args.host, args.port, path, args.requests, latencies, errors),
+        )
+        for _ in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+    }
+    if latencies:
+        report.update(
+            {
+                f"{name}_ms": round(value * 1000, 2)
+                for name, value in (
+                    ("mean", statistics.fmean(latencies)),
+                    ("p50", percentile(latencies, 0.50)),
+                    ("p95", percentile(latencies, 0.95)),
+                    ("p99", percentile(latencies, 0.99)),
+                    ("max", max(latencies)),
+                )
+            }
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
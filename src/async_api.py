@@ -0,0 +1,157 @@
+import asyncio
+import io
+import logging
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple
+
+from PIL import Image
+
+import src.utilities as utilities
+from src.decryptor import Decryptor
+from src.encryptor import Encryptor
+from src.envelope import Envelope
+
+logger = logging.getLogger(__name__)
+
+# jobs allowed in flight before callers wait their turn
+MAX_CONCURRENCY = utilities.MAX_WORKERS * 2
+
+
+class CipherBundle(NamedTuple):
+    key: bytes
+    token: bytes
+    key_image: tuple[Image.Image, int]
+    token_image: tuple[Image.Image, int]
+
+
+# module level jobs, so a ProcessPoolExecutor can pickle them
+def _encrypt_job(
+    data: str | bytes, file_name: str, mime_type: str, compression: str
+) -> CipherBundle:
+    encryptor = Encryptor()
+    if isinstance(data, bytes):
+        key, token = encryptor.encrypt_bytes(data, file_name, mime_type, compression)
+    else:
+        key, token = encryptor.encrypt(data, compression)
+
+    key_image = utilities.ArrayUtil(key).transform_array_image()
+    token_image = utilities.ArrayUtil(token).transform_array_image()
+
+    return CipherBundle(key, token, key_image, token_image)
+
+
+def _decrypt_job(key_image: str | Path | bytes, token_image: str | Path | bytes):
+    validator = utilities.Validator()
+    key_valid, key = validator.validate_upload(_as_source(key_image), "KEY")
+    token_valid, token = validator.validate_upload(_as_source(token_image), "CIPHER")
+
+    if not (key_valid and token_valid):
+        raise ValueError("Invalid KEY or CIPHER image.")
+
+    return Decryptor().decrypt_envelope(key, token)
+
+
+def _save_job(bundle: CipherBundle, input_data: str | bytes, path: str) -> str:
+    # save_cipher raises on failure, the path is only returned once written
+    utilities.CipherSaver(
+        input_data,
+        bundle.key,
+        bundle.token,
+        bundle.key_image,
+        bundle.token_image,
+    ).save_cipher(path)
+
+    return path
+
+
+def _as_source(image: str | Path | bytes):
+    # raw png bytes are read from memory, anything else is a path
+    if isinstance(image, bytes):
+        return io.BytesIO(image)
+    return image
+
+
+class AsyncSifrPN:
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ):
+        # None runs jobs on the event loop's default thread pool
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, job, *args):
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            return await loop.run_in_executor(self.executor, partial(job, *args))
+
+    async def encrypt_to_images(
+        self,
+        data: str | bytes,
+        file_name: str = "",
+        mime_type: str = "",
+        compression: str = "auto",
+    ) -> CipherBundle:
+        return await self._run(_encrypt_job, data, file_name, mime_type, compression)
+
+    async def decrypt_from_images(
+        self,
+        key_image: str | Path | bytes,
+        token_image: str | Path | bytes,
+    ) -> Envelope:
+        return await self._run(_decrypt_job, key_image, token_image)
+
+    async def save_bundle(
+        self,
+        bundle: CipherBundle,
+        path: str | Path,
+        input_data: str | bytes = "",
+    ) -> str:
+        return await self._run(_save_job, bundle, input_data, str(path))
+
+
+_default_api = None
+
+
+def _get_default_api() -> AsyncSifrPN:
+    global _default_api
+    if _default_api is None:
+        _default_api = AsyncSifrPN()
+    return _default_api
+
+
+async def encrypt_to_images(
+    data: str | bytes,
+    file_name: str = "",
+    mime_type: str = "",
+    compression: str = "auto",
+) -> CipherBundle:
+    return await _get_default_api().encrypt_to_images(
+        data, file_name, mime_type, compression
+    )
+
+
+async def decrypt_from_images(
+    key_image: str | Path | bytes,
+    token_image: str | Path | bytes,
+) -> Envelope:
+    return await _get_default_api().decrypt_from_images(key_image, token_image)
+
+
+async def save_bundle(
+    bundle: CipherBundle,
+    path: str | Path,
+    input_data: str | bytes = "",
+) -> str:
+    return await _get_default_api().save_bundle(bundle, path, input_data)
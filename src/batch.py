@@ -0,0 +1,373 @@
+import argparse
+import hashlib
+import io
+import json
+import logging
+import mimetypes
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+from zipfile import ZipFile
+
+import src.utilities as utilities
+from src.ciphers import DEFAULT_SUITE, SUITES
+from src.decryptor import Decryptor
+from src.encryptor import Encryptor
+from src.profiling import add_profile_arguments, configure_profiling
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE_NAME = ".sifrpn-batch.jsonl"
+# journal lines between two fsyncs, a crash loses at most these entries
+JOURNAL_SYNC_EVERY = 64
+# futures in flight per worker, bounds memory on very large batches
+QUEUE_DEPTH = 2
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+
+class BatchItem(NamedTuple):
+    source: Path
+    relative_path: str
+
+
+class BatchEntry(NamedTuple):
+    item: str
+    status: str
+    output: str
+    sha256: str
+    size: int
+    error: str
+    time: str
+
+
+class BatchReport(NamedTuple):
+    total: int
+    processed: int
+    skipped: int
+    failed: int
+    bytes_processed: int
+    seconds: float
+    failed_items: list[str]
+
+    @property
+    def items_per_second(self) -> float:
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_processed / 1_000_000 / self.seconds if self.seconds else 0.0
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BatchJournal:
+    # append-only jsonl, the last entry per item wins on load
+    def __init__(self, journal_path: str | Path):
+        self.journal_path = Path(journal_path)
+        self.file = None
+        self._unsynced = 0
+
+    def load(self) -> dict[str, BatchEntry]:
+        entries = {}
+
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = BatchEntry(**json.loads(line))
+                    except (ValueError, TypeError):
+                        # a torn last line from an interrupted run
+                        continue
+                    entries[entry.item] = entry
+        except FileNotFoundError:
+            pass
+
+        return entries
+
+    def __enter__(self):
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.journal_path, "a", encoding="utf-8")
+        return self
+
+    def append(self, entry: BatchEntry):
+        self.file.write(json.dumps(entry._asdict()) + "\n")
+        self.file.flush()
+
+        self._unsynced += 1
+        if self._unsynced >= JOURNAL_SYNC_EVERY:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self.file.fileno())
+        self._unsynced = 0
+
+    def __exit__(self, *_):
+        self.sync()
+        self.file.close()
+        self.file = None
+
+
+class BatchRunner:
+    # mode "encrypt": files to bundles, mode "decrypt": bundles to files
+    def __init__(
+        self,
+        mode: str,
+        output_dir: str | Path,
+        journal_path: str | Path | None = None,
+        max_workers: int = utilities.MAX_WORKERS,
+        retry_failed: bool = True,
+        suite: str = DEFAULT_SUITE,
+    ):
+        if mode not in ("encrypt", "decrypt"):
+            raise ValueError(f"Unknown batch mode: {mode}")
+
+        self.mode = mode
+        self.output_dir = Path(output_dir)
+        self.journal = BatchJournal(journal_path or self.output_dir / JOURNAL_FILE_NAME)
+        self.max_workers = max_workers
+        self.retry_failed = retry_failed
+        self.suite = suite
+
+        self.encryptor = Encryptor()
+        self.decryptor = Decryptor()
+        # one engine for the run, its buffers are kept per worker thread
+        self.engine = utilities.PixelEngine(utilities.BufferedRandomPadding())
+        self.validator = utilities.Validator(engine=self.engine)
+
+    def collect_items(self, sources: Iterable[str | Path]) -> list[BatchItem]:
+        # folders keep their tree below the output folder
+        items = []
+
+        for source in sources:
+            source = Path(source)
+            if source.is_dir():
+                pattern = "*.zip" if self.mode == "decrypt" else "*"
+                items.extend(
+                    BatchItem(path, path.relative_to(source).as_posix())
+                    for path in sorted(source.rglob(pattern))
+                    if path.is_file() and not path.name.startswith(".")
+                )
+            else:
+                items.append(BatchItem(source, source.name))
+
+        return items
+
+    def _encrypt_item(self, item: BatchItem) -> tuple[Path, int]:
+        data = utilities.read_file(item.source)
+        mime_type = mimetypes.guess_type(item.source.name)[0] or ""
+
+        output_path = self.encryptor.encrypt_to_bundle(
+            data,
+            self.output_dir / f"{item.relative_path}.zip",
+            item.source.name,
+            mime_type,
+            suite=self.suite,
+            engine=self.engine,
+        )
+
+        return output_path, len(data)
+
+    def _read_bundle_image(self, bundle: ZipFile, name: str, image_type: str) -> str:
+        is_valid, byte_string = self.validator.validate_upload(
+            io.BytesIO(bundle.read(name)), image_type
+        )
+        if not is_valid:
+            raise ValueError(f"Invalid {image_type} image in bundle.")
+        return byte_string
+
+    def _decrypt_item(self, item: BatchItem) -> tuple[Path, int]:
+        with ZipFile(item.source) as bundle:
+            key = self._read_bundle_image(bundle, utilities.KEY_IMAGE_NAME, "KEY")
+            token = self._read_bundle_image(
+                bundle, utilities.TOKEN_IMAGE_NAME, "CIPHER"
+            )
+
+        envelope = self.decryptor.decrypt_envelope(key, token)
+
+        # a.txt.zip goes back to a.txt, other names take the original suffix
+        relative_path = item.relative_path.removesuffix(".zip")
+        suffix = Path(envelope.file_name).suffix or ".txt"
+        if not relative_path.endswith(suffix):
+            relative_path += suffix
+
+        output_path = self.output_dir / relative_path
+        utilities.ResultSaver(output_path).save_result(envelope.iter_chunks())
+
+        return output_path, len(envelope.payload)
+
+    def _run_item(self, item: BatchItem) -> tuple[BatchEntry, int]:
+        run_item = self._encrypt_item if self.mode == "encrypt" else self._decrypt_item
+
+        try:
+            output_path, size = run_item(item)
+            sha256 = _sha256(output_path)
+        except Exception as e:
+            logger.exception(f"Batch Error: {e}")
+            entry = BatchEntry(
+                str(item.source),
+                STATUS_FAILED,
+                "",
+                "",
+                0,
+                str(e) or type(e).__name__,
+                datetime.now().isoformat(),
+            )
+            return entry, 0
+
+        entry = BatchEntry(
+            str(item.source),
+            STATUS_OK,
+            str(output_path),
+            sha256,
+            size,
+            "",
+            datetime.now().isoformat(),
+        )
+        return entry, size
+
+    def _is_done(self, entry: BatchEntry | None) -> bool:
+        if entry is None:
+            return False
+        if entry.status == STATUS_FAILED:
+            return not self.retry_failed
+        # a deleted output is redone, the journal alone is not trusted
+        return Path(entry.output).exists()
+
+    def run_iter(
+        self, sources: Iterable[str | Path]
+    ) -> Iterator[tuple[BatchEntry, BatchReport]]:
+        # yields every finished item with the running totals
+        items = self.collect_items(sources)
+        previous = self.journal.load()
+        todo = [
+            item for item in items if not self._is_done(previous.get(str(item.source)))
+        ]
+
+        skipped = len(items) - len(todo)
+        processed = failed = bytes_processed = 0
+        failed_items = []
+        started_at = time.perf_counter()
+
+        logger.info(
+            "Batch %s: %d items, %d already done.", self.mode, len(items), skipped
+        )
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        with self.journal, ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            todo_iter = iter(todo)
+
+            while True:
+                # keep a bounded window of futures instead of one per item
+                for item in todo_iter:
+                    pending.add(executor.submit(self._run_item, item))
+                    if len(pending) >= self.max_workers * QUEUE_DEPTH:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry, size = future.result()
+                    self.journal.append(entry)
+
+                    processed += 1
+                    bytes_processed += size
+                    if entry.status == STATUS_FAILED:
+                        failed += 1
+                        failed_items.append(entry.item)
+
+                    yield entry, BatchReport(
+                        len(items),
+                        processed,
+                        skipped,
+                        failed,
+                        bytes_processed,
+                        time.perf_counter() - started_at,
+                        list(failed_items),
+                    )
+
+    def run(self, sources: Iterable[str | Path]) -> BatchReport:
+        report = None
+        for _, report in self.run_iter(sources):
+            pass
+
+        if report is None:
+            items = self.collect_items(sources)
+            report = BatchReport(len(items), 0, len(items), 0, 0, 0.0, [])
+
+        logger.info(
+            "Batch %s finished: %d processed, %d failed, %.1f MB/s.",
+            self.mode,
+            report.processed,
+            report.failed,
+            report.megabytes_per_second,
+        )
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Resumable bulk encrypt or decrypt with a journal."
+    )
+    parser.add_argument("mode", choices=["encrypt", "decrypt"])
+    parser.add_argument("sources", nargs="+")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--journal", default=None)
+    parser.add_argument("--workers", type=int, default=utilities.MAX_WORKERS)
+    parser.add_argument("--suite", choices=list(SUITES), default=DEFAULT_SUITE)
+    parser.add_argument(
+        "--no-retry", action="store_true", help="skip items that failed before"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    runner = BatchRunner(
+        args.mode,
+        args.output,
+        journal_path=args.journal,
+        max_workers=args.workers,
+        retry_failed=not args.no_retry,
+        suite=args.suite,
+    )
+
+    report = None
+    for entry, report in runner.run_iter(args.sources):
+        if entry.status == STATUS_FAILED:
+            print(f"  FAILED {entry.item}: {entry.error}")
+        if report.processed % 100 == 0:
+            print(
+                f"{report.processed + report.skipped}/{report.total} "
+                f"{report.items_per_second:.1f} items/s "
+                f"{report.megabytes_per_second:.1f} MB/s"
+            )
+
+    if report is None:
+        print("Nothing to do, every item is already in the journal.")
+        return
+
+    print(
+        f"Done: {report.processed} processed, {report.skipped} skipped, "
+        f"{report.failed} failed in {report.seconds:.1f}s "
+        f"({report.items_per_second:.1f} items/s, "
+        f"{report.megabytes_per_second:.1f} MB/s)."
+    )
+    for item in report.failed_items:
+        print(f"  retry: {item}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = Path.home() / "Documents" / "ciphers" / "catalog.sqlite3"
+
+# metadata only, the catalog never stores inputs, keys or tokens
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bundles (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    input_size INTEGER NOT NULL,
+    token_size INTEGER NOT NULL,
+    bundle_size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    key_width INTEGER NOT NULL,
+    key_height INTEGER NOT NULL,
+    token_width INTEGER NOT NULL,
+    token_height INTEGER NOT NULL,
+    image_types TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bundles_saved_at ON bundles (saved_at);
+CREATE INDEX IF NOT EXISTS bundles_sha256 ON bundles (sha256);
+CREATE INDEX IF NOT EXISTS bundles_path ON bundles (path);
+"""
+
+ENTRY_COLUMNS = (
+    "path, saved_at, input_size, token_size, bundle_size, sha256, "
+    "key_width, key_height, token_width, token_height, image_types"
+)
+COLUMNS = f"id, {ENTRY_COLUMNS}"
+
+
+class CatalogEntry(NamedTuple):
+    id: int
+    path: str
+    saved_at: str
+    input_size: int
+    token_size: int
+    bundle_size: int
+    sha256: str
+    key_width: int
+    key_height: int
+    token_width: int
+    token_height: int
+    image_types: str
+
+
+class CipherCatalog:
+    def __init__(self, db_path: str | Path = CATALOG_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with closing(self._connect()) as connection, connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def _hash_file(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def record(
+        self,
+        bundle_path: str | Path,
+        input_size: int,
+        token_size: int,
+        key_dimensions: tuple[int, int],
+        token_dimensions: tuple[int, int],
+        image_types: tuple[str, ...] = ("KEY", "CIPHER"),
+    ) -> CatalogEntry:
+        bundle_path = Path(bundle_path).resolve()
+        values = (
+            str(bundle_path),
+            datetime.now().isoformat(),
+            input_size,
+            token_size,
+            bundle_path.stat().st_size,
+            self._hash_file(bundle_path),
+            *key_dimensions,
+            *token_dimensions,
+            ",".join(image_types),
+        )
+
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                f"INSERT INTO bundles ({ENTRY_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            entry = CatalogEntry(cursor.lastrowid, *values)
+
+        logger.info("Bundle %s added to catalog.", bundle_path.name)
+        return entry
+
+    def _query(self, where: str = "", params: tuple = (), limit: int = 100):
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                f"SELECT {COLUMNS} FROM bundles {where} "
+                "ORDER BY saved_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+
+        return [CatalogEntry(*row) for row in rows]
+
+    def recent(self, limit: int = 20) -> list[CatalogEntry]:
+        return self._query(limit=limit)
+
+    def lookup(self, sha256: str) -> CatalogEntry | None:
+        entries = self._query("WHERE sha256 = ?", (sha256,), limit=1)
+        return entries[0] if entries else None
+
+    def lookup_path(self, bundle_path: str | Path) -> CatalogEntry | None:
+        bundle_path = str(Path(bundle_path).resolve())
+        entries = self._query("WHERE path = ?", (bundle_path,), limit=1)
+        return entries[0] if entries else None
+
+    def find(
+        self,
+        name: str = "",
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = 100,
+    ) -> list[CatalogEntry]:
+        conditions, params = [], []
+
+        if name:
+            conditions.append("path LIKE ?")
+            params.append(f"%{name}%")
+        if since:
+            conditions.append("saved_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            conditions.append("saved_at < ?")
+            params.append(until.isoformat())
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query(where, tuple(params), limit)
+
+    def remove(self, entry_id: int) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM bundles WHERE id = ?", (entry_id,))
@@ -0,0 +1,122 @@
+import os
+import struct
+from abc import ABC, abstractmethod
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+# aead token, urlsafe base64 of:
+# MAGIC | version | suite id | nonce | ciphertext + tag
+# fernet tokens start with 0x80, so the two never collide
+MAGIC = b"SPNA"
+VERSION = 1
+HEADER = struct.Struct(">BB")
+HEADER_SIZE = len(MAGIC) + HEADER.size
+NONCE_SIZE = 12
+
+DEFAULT_SUITE = "fernet"
+
+
+class CipherSuite(ABC):
+    # every suite takes the same key, urlsafe base64 of 32 random bytes
+    name = ""
+
+    @abstractmethod
+    def encrypt(self, key: str | bytes, plaintext: bytes) -> bytes: ...
+
+    @abstractmethod
+    def decrypt(self, key: str | bytes, token: str | bytes) -> bytes: ...
+
+
+class FernetSuite(CipherSuite):
+    # aes-128-cbc with a separate hmac-sha256 pass
+    name = "fernet"
+
+    def encrypt(self, key: str | bytes, plaintext: bytes) -> bytes:
+        return Fernet(key).encrypt(plaintext)
+
+    def decrypt(self, key: str | bytes, token: str | bytes) -> bytes:
+        return Fernet(key).decrypt(token)
+
+
+class AEADSuite(CipherSuite):
+    # one pass that encrypts and authenticates, the full 32 byte key is used,
+    # subclasses set suite_id and algorithm as class attributes
+    @property
+    @abstractmethod
+    def suite_id(self) -> int: ...
+
+    @property
+    @abstractmethod
+    def algorithm(self): ...
+
+    def _header(self) -> bytes:
+        return MAGIC + HEADER.pack(VERSION, self.suite_id)
+
+    def encrypt(self, key: str | bytes, plaintext: bytes) -> bytes:
+        header = self._header()
+        nonce = os.urandom(NONCE_SIZE)
+
+        # the header is authenticated, so a relabelled token fails to open
+        ciphertext = self.algorithm(urlsafe_b64decode(key)).encrypt(
+            nonce, plaintext, header
+        )
+
+        # still base64, the pixel and validation pipeline is text based
+        return urlsafe_b64encode(b"".join((header, nonce, ciphertext)))
+
+    def decrypt(self, key: str | bytes, token: str | bytes) -> bytes:
+        raw = urlsafe_b64decode(token)
+        header = raw[:HEADER_SIZE]
+        nonce = raw[HEADER_SIZE : HEADER_SIZE + NONCE_SIZE]
+
+        return self.algorithm(urlsafe_b64decode(key)).decrypt(
+            nonce, raw[HEADER_SIZE + NONCE_SIZE :], header
+        )
+
+
+class AESGCMSuite(AEADSuite):
+    name = "aes-256-gcm"
+    suite_id = 1
+    algorithm = AESGCM
+
+
+class ChaCha20Poly1305Suite(AEADSuite):
+    name = "chacha20-poly1305"
+    suite_id = 2
+    algorithm = ChaCha20Poly1305
+
+
+SUITES = {
+    suite.name: suite
+    for suite in (FernetSuite(), AESGCMSuite(), ChaCha20Poly1305Suite())
+}
+
+
+def get_suite(name: str) -> CipherSuite:
+    if name not in SUITES:
+        raise ValueError(f"Unknown cipher suite: {name}")
+    return SUITES[name]
+
+
+def detect_suite(token: str | bytes) -> CipherSuite:
+    # 8 base64 chars decode to exactly the 6 header bytes
+    head = token[:8]
+    try:
+        raw = urlsafe_b64decode(head)
+    except ValueError:
+        raw = b""
+
+    if not raw.startswith(MAGIC):
+        return SUITES["fernet"]
+
+    version, suite_id = HEADER.unpack_from(raw, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"Unsupported cipher token version: {version}")
+
+    for suite in SUITES.values():
+        if isinstance(suite, AEADSuite) and suite.suite_id == suite_id:
+            return suite
+
+    raise ValueError(f"Unknown cipher suite id: {suite_id}")
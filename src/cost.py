@@ -0,0 +1,145 @@
+import logging
+from math import ceil
+from typing import NamedTuple
+
+import src.utilities as utilities
+from src.ciphers import DEFAULT_SUITE
+
+logger = logging.getLogger(__name__)
+
+# peak memory one job may take, above it the job is refused
+MEMORY_BUDGET = 1024 * 1024 * 1024
+# jobs expected to run longer than this are flagged as slow
+SLOW_JOB_SECONDS = 5.0
+
+# measured on the fernet path: read, encrypt, pixel build, png and zip
+# hold about nine live copies of the token bytes at their peak
+PEAK_TOKEN_FACTOR = 9
+# decode, decrypt and unpack of an uploaded image
+PEAK_IMAGE_FACTOR = 6
+BASE_MEMORY = 64 * 1024 * 1024
+# end to end bytes per second for encrypt and save
+THROUGHPUT = 10 * 1024 * 1024
+
+# envelope v2 fixed header: magic, version, codec, name and mime lengths
+ENVELOPE_HEADER_SIZE = 10
+KEY_SIZE = 32
+
+ROUTE_DIRECT = "direct"
+ROUTE_SLOW = "slow"
+ROUTE_REFUSE = "refuse"
+
+
+class JobEstimate(NamedTuple):
+    input_size: int
+    token_size: int
+    key_dimensions: tuple[int, int]
+    token_dimensions: tuple[int, int]
+    scale_factor: int
+    peak_memory: int
+    seconds: float
+    route: str
+
+
+class CostModel:
+    # predicts a job's footprint from sizes alone, nothing is encrypted
+    def __init__(
+        self,
+        memory_budget: int = MEMORY_BUDGET,
+        slow_seconds: float = SLOW_JOB_SECONDS,
+        layout: str = "square",
+        channels: int = 3,
+        suite: str = DEFAULT_SUITE,
+    ):
+        self.memory_budget = memory_budget
+        self.slow_seconds = slow_seconds
+        self.suite = suite
+        self._array_util = utilities.ArrayUtil(b"", layout=layout, channels=channels)
+
+    def _cipher_size(self, envelope_size: int) -> int:
+        # raw token bytes, the pixels hold these, not the base64 text
+        if self.suite == "fernet":
+            # version, timestamp, iv, pkcs7 padded body, hmac
+            return 1 + 8 + 16 + (envelope_size // 16 + 1) * 16 + 32
+
+        # header, nonce, body, tag
+        return 6 + 12 + envelope_size + 16
+
+    def _dimensions(self, raw_size: int) -> tuple[int, int]:
+        width, height, _ = self._array_util._calc_layout(raw_size)
+        return width, height
+
+    def _route(self, peak_memory: int, seconds: float) -> str:
+        if peak_memory > self.memory_budget:
+            return ROUTE_REFUSE
+        if seconds > self.slow_seconds:
+            return ROUTE_SLOW
+        return ROUTE_DIRECT
+
+    def estimate(
+        self, input_size: int, file_name: str = "", mime_type: str = ""
+    ) -> JobEstimate:
+        # worst case, the envelope is not compressed
+        envelope_size = (
+            ENVELOPE_HEADER_SIZE
+            + len(file_name.encode())
+            + len(mime_type.encode())
+            + input_size
+        )
+        raw_size = self._cipher_size(envelope_size)
+        token_size = 4 * ceil(raw_size / 3)
+
+        key_dimensions = self._dimensions(KEY_SIZE)
+        token_dimensions = self._dimensions(raw_size)
+        scale_factor = utilities.rescale_factor(max(token_dimensions))
+
+        # the saved rescaled copies of both images, only small images get them
+        rescaled_bytes = sum(
+            width
+            * height
+            * self._array_util.channels
+            * utilities.rescale_factor(max(width, height)) ** 2
+            for width, height in (key_dimensions, token_dimensions)
+        )
+
+        peak_memory = BASE_MEMORY + raw_size * PEAK_TOKEN_FACTOR + rescaled_bytes
+        seconds = raw_size / THROUGHPUT
+
+        return JobEstimate(
+            input_size,
+            token_size,
+            key_dimensions,
+            token_dimensions,
+            scale_factor,
+            peak_memory,
+            seconds,
+            self._route(peak_memory, seconds),
+        )
+
+    def estimate_image(self, width: int, height: int, channels: int = 3) -> JobEstimate:
+        # decrypt side, from the stored png size before any pixel decode
+        pixel_bytes = width * height * channels
+        peak_memory = BASE_MEMORY + pixel_bytes * PEAK_IMAGE_FACTOR
+        seconds = pixel_bytes / THROUGHPUT
+
+        return JobEstimate(
+            pixel_bytes,
+            4 * ceil(pixel_bytes / 3),
+            (0, 0),
+            (width, height),
+            1,
+            peak_memory,
+            seconds,
+            self._route(peak_memory, seconds),
+        )
+
+    def describe(self, estimate: JobEstimate) -> str:
+        megabytes = ceil(estimate.peak_memory / (1024 * 1024))
+        width, height = estimate.token_dimensions
+
+        if estimate.route == ROUTE_REFUSE:
+            budget = self.memory_budget // (1024 * 1024)
+            return f"Too large: needs ~{megabytes} MB, limit is {budget} MB."
+        if estimate.route == ROUTE_SLOW:
+            return f"Large input: ~{ceil(estimate.seconds)}s, {width}x{height} px."
+        return f"~{megabytes} MB, {width}x{height} px."
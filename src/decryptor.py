@@ -1,7 +1,151 @@
-from cryptography.fernet import Fernet
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+import src.utilities as utilities
+from src.ciphers import detect_suite
+from src.envelope import Envelope
+from src.profiling import profiled
+
+logger = logging.getLogger(__name__)
 
 
 class Decryptor:
-    def decrypt(self, key: str | bytes, token: str | bytes):
-        f = Fernet(key)
-        return f.decrypt(token)
+    def decrypt(self, key: str | bytes, token: str | bytes, progress=None):
+        return self.decrypt_envelope(key, token, progress).payload
+
+    @profiled("decrypt")
+    def decrypt_envelope(
+        self, key: str | bytes, token: str | bytes, progress=None
+    ) -> Envelope:
+        reporter = utilities.as_reporter(progress)
+        reporter("decrypt", 0, len(token))
+
+        # fernet or an aead suite, read from the token header
+        cipher_suite = detect_suite(token)
+        envelope = Envelope.unpack(cipher_suite.decrypt(key, token))
+
+        reporter("decrypt", len(token), len(token))
+        return envelope
+
+    def unwrap_key(self, key: str | bytes, wrapped_key: str | bytes) -> bytes:
+        return detect_suite(wrapped_key).decrypt(key, wrapped_key)
+
+    @profiled("decrypt")
+    def decrypt_wrapped(
+        self,
+        key: str | bytes,
+        wrapped_key: str | bytes,
+        token: str | bytes,
+        progress=None,
+    ) -> Envelope:
+        # the recipient's own key opens the data key, the data key opens the token
+        data_key = self.unwrap_key(key, wrapped_key)
+        return self.decrypt_envelope(data_key, token, progress)
+
+
+class BulkResult(NamedTuple):
+    token_path: Path
+    output_path: Path | None
+    status: str
+    message: str
+
+
+class BulkDecryptor:
+    # decrypts many token images that share one key image
+    def __init__(
+        self,
+        key_path: str | Path,
+        output_dir: str | Path,
+        max_workers: int = utilities.MAX_WORKERS,
+    ):
+        self.key_path = Path(key_path)
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers
+        self.validator = utilities.Validator()
+        self.sniffer = utilities.PngSniffer()
+        self.decryptor = Decryptor()
+
+    def _load_key(self) -> str:
+        is_valid, key = self.validator.validate_upload(self.key_path, "KEY")
+
+        if not is_valid:
+            raise ValueError(f"Invalid KEY image: {self.key_path.name}")
+
+        return key
+
+    def collect_tokens(self, sources: Iterable[str | Path]) -> list[Path]:
+        token_paths = []
+
+        for source in sources:
+            source = Path(source)
+            if source.is_dir():
+                # triage by png metadata, only CIPHER images get decoded
+                token_paths.extend(
+                    path for path, _ in self.sniffer.scan_folder(source, "CIPHER")
+                )
+            else:
+                token_paths.append(source)
+
+        return [path for path in token_paths if path != self.key_path]
+
+    def _output_stems(self, token_paths: list[Path]) -> dict[Path, str]:
+        # tokens from different folders may share a name, fold in the parent
+        # folder and then a counter so no result overwrites another
+        stem_counts = Counter(path.stem for path in token_paths)
+        stems = {}
+        taken = set()
+
+        for path in token_paths:
+            stem = path.stem
+            if stem_counts[stem] > 1:
+                stem = f"{path.parent.name}_{stem}"
+
+            unique_stem = stem
+            count = 1
+            while unique_stem in taken:
+                count += 1
+                unique_stem = f"{stem}_{count}"
+
+            taken.add(unique_stem)
+            stems[path] = unique_stem
+
+        return stems
+
+    def _decrypt_one(self, key: str, token_path: Path, stem: str) -> BulkResult:
+        try:
+            is_valid, token = self.validator.validate_upload(token_path, "CIPHER")
+            if not is_valid:
+                return BulkResult(token_path, None, "INVALID", "Not a CIPHER image.")
+
+            envelope = self.decryptor.decrypt_envelope(key, token)
+
+            # keep the original extension, the stem keeps outputs unique
+            suffix = Path(envelope.file_name).suffix or ".txt"
+            output_path = self.output_dir / f"{stem}{suffix}"
+            utilities.ResultSaver(output_path).save_result(envelope.iter_chunks())
+        except Exception as e:
+            logger.exception(f"Bulk Decrypt Error: {e}")
+            return BulkResult(token_path, None, "FAILED", str(e) or type(e).__name__)
+        else:
+            return BulkResult(token_path, output_path, "OK", "Decrypted.")
+
+    def decrypt_many(self, sources: Iterable[str | Path]) -> Iterator[BulkResult]:
+        # results are yielded as each token finishes, not in input order
+        key = self._load_key()
+        token_paths = list(dict.fromkeys(self.collect_tokens(sources)))
+        stems = self._output_stems(token_paths)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._decrypt_one, key, token_path, stems[token_path])
+                for token_path in token_paths
+            ]
+
+            for future in as_completed(futures):
+                yield future.result()
+
+        logger.info("Bulk decrypt of %d tokens completed.", len(token_paths))
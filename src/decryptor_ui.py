@@ -1,8 +1,13 @@
+import io
 import logging.config
+import queue
+import threading
 import tkinter.filedialog as fd
 import tkinter.font as tk_font
+import zlib
 from datetime import datetime
 from pathlib import Path
+from zipfile import ZipFile
 
 import ttkbootstrap as ttk
 import yaml
@@ -10,8 +15,11 @@ from tktooltip import ToolTip
 from ttkbootstrap.scrolled import ScrolledText
 
 import src.utilities as utilities
-from src.decryptor import Decryptor
-from src.encryptor_ui import CustomToastNotification
+from src.catalog import CipherCatalog
+from src.cost import CostModel
+from src.decryptor import BulkDecryptor, Decryptor
+from src.encryptor_ui import POLL_MS, CustomToastNotification, StageProgress
+from src.envelope import Envelope
 
 config_path = Path(__file__).parent.parent / "configs" / "logging_config.yaml"
 
@@ -23,6 +31,10 @@ logger = logging.getLogger(__name__)
 
 IMG_PATH = Path(__file__).parent.parent / "assets"
 
+# pastes longer than this are summarized instead of rendered
+PASTE_PREVIEW_THRESHOLD = 792
+PASTE_PREVIEW_EDGE = 48
+
 
 class DecryptUI(ttk.Frame):
     def __init__(self, parent: ttk.Notebook):
@@ -69,13 +81,17 @@ class InputManager(ttk.Frame):
         # variables
         self.upload_file_name = ""
         self.paste_popup = None
+        self.bulk_popup = None
+        self.recent_popup = None
 
         self.input_container_child = ttk.Frame(master=self)
         self.input_container_child.grid(row=0, column=0, columnspan=2, sticky="nsew")
 
         self.input_container_child.rowconfigure(0, weight=1)
         self.input_container_child.columnconfigure(0, weight=1)
-        self.input_container_child.columnconfigure(1, weight=999)
+        self.input_container_child.columnconfigure(1, weight=1)
+        self.input_container_child.columnconfigure(2, weight=1)
+        self.input_container_child.columnconfigure(3, weight=999)
 
         self.input_container_label = ttk.Label(
             master=self.input_container_child,
@@ -103,17 +119,51 @@ class InputManager(ttk.Frame):
             sticky="w",
         )
 
+        self.bulk_button = ttk.Button(
+            master=self.input_container_child,
+            text="BULK",
+            bootstyle="info-outline",
+            command=self._bulk,
+            padding=(4, 2),
+            takefocus=0,
+        )
+        self.bulk_button.grid(
+            row=0,
+            column=2,
+            sticky="w",
+            padx=(5, 0),
+        )
+        ToolTip(self.bulk_button, msg="Decrypt many tokens with one key.")
+
+        self.recent_button = ttk.Button(
+            master=self.input_container_child,
+            text="RECENT",
+            bootstyle="info-outline",
+            command=self._recent,
+            padding=(4, 2),
+            takefocus=0,
+        )
+        self.recent_button.grid(
+            row=0,
+            column=3,
+            sticky="w",
+            padx=(5, 0),
+        )
+        ToolTip(self.recent_button, msg="Recently saved bundles.")
+
         self.upload_key = UploadManager(
             master=self,
             col=0,
             upload_type="KEY",
             on_validity_change=self._update_submit_state,
+            on_progress=self._on_decode_progress,
         )
         self.upload_token = UploadManager(
             master=self,
             col=1,
             upload_type="CIPHER",
             on_validity_change=self._update_submit_state,
+            on_progress=self._on_decode_progress,
         )
 
         self.submit_button = ttk.Button(
@@ -128,6 +178,10 @@ class InputManager(ttk.Frame):
         self.submit_button.grid(row=2, column=0, columnspan=2, pady=(4, 4))
         self._update_submit_state()
 
+        self.progress = StageProgress(
+            self, row=3, column=0, columnspan=2, sticky="ew", pady=(0, 5)
+        )
+
     def _paste(self):
         remove_uli_cb = (
             self.upload_key.on_remove_file,
@@ -137,10 +191,35 @@ class InputManager(ttk.Frame):
             remove_uli_cb,
             self.output_display.display,
             self.button_set.display_buttons,
-            self.button_set.file_content,
+            self._set_file_content,
         )
         self.wait_window(self.paste_popup)
 
+    def _set_file_content(self, result: Envelope):
+        self.button_set.file_content = result
+
+    def _bulk(self):
+        self.bulk_popup = BulkPopup()
+        self.wait_window(self.bulk_popup)
+
+    def _recent(self):
+        self.recent_popup = RecentPopup(self._load_bundle)
+        self.wait_window(self.recent_popup)
+
+    def _load_bundle(self, bundle_path: str):
+        # validated straight from memory, the key image never touches the disk,
+        # the bundle path only serves stale-submission tracking
+        with ZipFile(bundle_path) as bundle:
+            for upload_manager, member in (
+                (self.upload_key, utilities.KEY_IMAGE_NAME),
+                (self.upload_token, utilities.TOKEN_IMAGE_NAME),
+            ):
+                upload_manager.upload_file_path = bundle_path
+                upload_manager._validate_image(
+                    io.BytesIO(bundle.read(member)),
+                    display_name=f"{Path(bundle_path).name}/{member}",
+                )
+
     def _update_submit_state(self):
         if self.upload_key.valid_state and self.upload_token.valid_state:
             self.submit_button.config(state="normal")
@@ -163,9 +242,60 @@ class InputManager(ttk.Frame):
         key_bytes = self.upload_key.byte_string
         token_bytes = self.upload_token.byte_string
 
-        # pass the text form to decryptor
-        input_decryptor = InputDecryptor()
-        result = input_decryptor.execute_decrypt(key_bytes, token_bytes)
+        # pass the text form to decryptor, off the tk thread
+        result_queue = queue.Queue()
+        self.submit_button.config(state="disabled")
+        threading.Thread(
+            target=self._decrypt_worker,
+            args=(key_bytes, token_bytes, result_queue),
+            daemon=True,
+        ).start()
+        self.after(POLL_MS, self._poll_decrypt, result_queue)
+
+    def _on_decode_progress(self, stage: str, done: int, total: int):
+        # image decode runs on the tk thread, so repaint the bar by hand
+        if done < total:
+            self.progress.update_stage(stage, done, total)
+            self.update_idletasks()
+        else:
+            self.progress.finish()
+
+    def _decrypt_worker(self, key_bytes, token_bytes, result_queue: queue.Queue):
+        # worker thread: never touches tk, only the queue
+        try:
+            result = InputDecryptor().execute_decrypt(
+                key_bytes,
+                token_bytes,
+                progress=lambda *report: result_queue.put(("progress", *report)),
+            )
+        except Exception as e:
+            logger.exception(f"Decrypt Error: {e}")
+            result_queue.put(("result", None))
+        else:
+            result_queue.put(("result", result))
+
+    def _poll_decrypt(self, result_queue: queue.Queue):
+        try:
+            while True:
+                message = result_queue.get_nowait()
+                if message[0] == "progress":
+                    self.progress.update_stage(*message[1:])
+                else:
+                    self._on_decrypted(message[1])
+                    return
+        except queue.Empty:
+            pass
+
+        self.after(POLL_MS, self._poll_decrypt, result_queue)
+
+    def _on_decrypted(self, result: Envelope | None):
+        self.progress.finish()
+        self._update_submit_state()
+
+        if result is None:
+            self.custom_toast_notification.show_toast("error", "Decryption failed.")
+            return
+
         # display result
         self.output_display.display(result)
         self.button_set.display_buttons()
@@ -186,7 +316,12 @@ class InputManager(ttk.Frame):
 
 class UploadManager(ttk.Frame):
     def __init__(
-        self, master: ttk.Frame, col: int, upload_type: str, on_validity_change=None
+        self,
+        master: ttk.Frame,
+        col: int,
+        upload_type: str,
+        on_validity_change=None,
+        on_progress=None,
     ):
         super().__init__(master)
         self.grid(row=1, column=col, sticky="nsew", pady=(0, 5))
@@ -204,7 +339,7 @@ class UploadManager(ttk.Frame):
         }
 
         # CLASS INSTANCES
-        self.validator = utilities.Validator()
+        self.validator = utilities.Validator(CostModel())
 
         # variables
         self.upload_type = upload_type
@@ -212,6 +347,7 @@ class UploadManager(ttk.Frame):
         self.valid_state = False
         self._byte_string = ""
         self.on_validity_change = on_validity_change
+        self.on_progress = on_progress
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -282,7 +418,7 @@ class UploadManager(ttk.Frame):
 
         self._validate_image(self.upload_file_path)
 
-    def _validate_image(self, upload_path: str):
+    def _validate_image(self, upload_path, display_name: str = ""):
         def format_file_name(file_name: str):
             limit_len = 40
             total_len = len(file_name)
@@ -295,7 +431,9 @@ class UploadManager(ttk.Frame):
 
         prev_state = self.valid_state
         container_type = self.upload_type
-        state, byte_string = self.validator.validate_upload(upload_path, container_type)
+        state, byte_string = self.validator.validate_upload(
+            upload_path, container_type, progress=self.on_progress
+        )
 
         if state:
             self.valid_state = True
@@ -315,7 +453,7 @@ class UploadManager(ttk.Frame):
             self.uvl_tt.msg = f"Invalid {self.upload_type} image."
 
         self.upload_file_name.config(
-            text=format_file_name(Path(upload_path).name),
+            text=format_file_name(display_name or Path(upload_path).name),
         )
 
         self.upload_child.grid(row=0, column=2, sticky="w")
@@ -336,7 +474,7 @@ class UploadManager(ttk.Frame):
 
 class PastePopup(ttk.Toplevel):
     def __init__(
-        self, remove_uli_cb, output_display_cb, button_display_cb, file_content
+        self, remove_uli_cb, output_display_cb, button_display_cb, file_content_cb
     ):
         super().__init__(
             minsize=(980, 1),
@@ -371,7 +509,7 @@ class PastePopup(ttk.Toplevel):
         self.remove_uli_cb = remove_uli_cb
         self.out_display_cb = output_display_cb
         self.button_show_cb = button_display_cb
-        self.file_content = file_content
+        self.file_content_cb = file_content_cb
 
         self.paste_label = ttk.Label(
             master=self,
@@ -442,7 +580,7 @@ class PastePopup(ttk.Toplevel):
             i()
         self.out_display_cb(result)
         self.button_show_cb()
-        self.file_content = result
+        self.file_content_cb(result)
 
 
 class InputBox(ttk.Frame):
@@ -542,19 +680,28 @@ class InputBox(ttk.Frame):
         if input_string == self.old_input:
             return
 
-        if len(input_string) > 792:
-            self.input_entry.set_autohide(False)
+        # long tokens skip tk text layout, only a summary is rendered
+        if len(input_string) > PASTE_PREVIEW_THRESHOLD:
+            display_string = self._summarize(input_string)
         else:
-            self.input_entry.set_autohide(True)
+            display_string = input_string
 
+        self.input_entry.set_autohide(True)
         self.input_entry.text.config(state="normal")
         self.input_entry.text.delete("1.0", "end")
-        self.input_entry.insert(ttk.INSERT, input_string)
+        self.input_entry.insert(ttk.INSERT, display_string)
         self.input_entry.text.config(state="disabled")
         self.old_input = input_string
 
         self._update_label(input_string)
 
+    def _summarize(self, string):
+        checksum = zlib.crc32(string.encode())
+        head = string[:PASTE_PREVIEW_EDGE].strip()
+        tail = string[-PASTE_PREVIEW_EDGE:].strip()
+
+        return f"{len(string):,} chars pasted · CRC32 {checksum:08X}\n{head} … {tail}"
+
     def _update_label(self, string):
         prev_state = self.valid_state
         curr_state, self._clean_string = self.validator.validate_string(
@@ -578,6 +725,374 @@ class InputBox(ttk.Frame):
         return self._clean_string
 
 
+class BulkPopup(ttk.Toplevel):
+    def __init__(self):
+        super().__init__(
+            minsize=(980, 1),
+            resizable=(False, False),
+            overrideredirect=True,
+        )
+        self.config(
+            highlightthickness=2,
+            highlightbackground="#555555",
+            relief="raised",
+        )
+        self.grab_set()
+
+        # POSITION
+        self.x = (self.winfo_screenwidth() // 2) - (980 // 2)
+        self.y = (self.winfo_screenheight() // 2) - (590 // 2)
+        offset = 8
+        self.geometry(f"+{self.x + offset}+{self.y - offset}")
+
+        for _ in range(6):
+            self.rowconfigure(_, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=999)
+        self.columnconfigure(2, weight=1)
+
+        # FONTS
+        self.sm_font = tk_font.Font(family="Inter Regular", size=12)
+        self.mm_font = tk_font.Font(family="Inter Italic", size=11)
+
+        # ICONS
+        self.icons = {
+            "close": ttk.PhotoImage(file=IMG_PATH / "close.png"),
+            "unlock": ttk.PhotoImage(file=IMG_PATH / "unlock.png"),
+            "upload": ttk.PhotoImage(file=IMG_PATH / "upload.png"),
+        }
+
+        # VARIABLES
+        self.key_path = ""
+        self.token_sources: list[str] = []
+        self.output_dir = str(Path.home() / "Documents" / "ciphers" / "decrypted")
+        self.result_queue = queue.Queue()
+        self.running = False
+        self.poll_id = None
+
+        self.bulk_label = ttk.Label(
+            master=self,
+            text="BULK DECRYPT",
+            font=("Inter Bold", 14),
+        )
+        self.bulk_label.grid(
+            row=0, column=0, columnspan=2, sticky="nw", padx=(10, 10), pady=(12, 10)
+        )
+
+        self.close_button = ttk.Button(
+            master=self,
+            image=self.icons["close"],
+            command=self._on_close,
+            bootstyle="primary-outline",
+            padding=0,
+        )
+        self.close_button.grid(
+            row=0, column=2, sticky="ne", padx=(10, 10), pady=(12, 10)
+        )
+
+        # SELECTION ROWS
+        self.key_name = self._selection_row(1, "KEY\t→ ", self._on_select_key)
+        self.token_name = self._selection_row(2, "CIPHERS\t→ ", self._on_select_tokens)
+        self.token_folder_button = ttk.Button(
+            master=self,
+            text="FOLDER",
+            command=self._on_select_token_folder,
+            bootstyle="success-outline",
+            padding=(4, 0),
+        )
+        self.token_folder_button.grid(row=2, column=2, sticky="e", padx=(0, 10))
+        self.output_name = self._selection_row(3, "OUTPUT\t→ ", self._on_select_output)
+        self.output_name.config(text=self.output_dir)
+
+        # STATUS TABLE
+        self.status_table = ttk.Treeview(
+            master=self,
+            columns=("token", "status", "output"),
+            show="headings",
+            height=12,
+            bootstyle="dark",
+        )
+        self.status_table.heading("token", text="CIPHER IMAGE", anchor="w")
+        self.status_table.heading("status", text="STATUS", anchor="w")
+        self.status_table.heading("output", text="RESULT", anchor="w")
+        self.status_table.column("token", width=360)
+        self.status_table.column("status", width=100)
+        self.status_table.column("output", width=480)
+        self.status_table.grid(
+            row=4, column=0, columnspan=3, sticky="nsew", padx=(10, 10), pady=(10, 10)
+        )
+
+        self.submit_button = ttk.Button(
+            master=self,
+            text="DECRYPT",
+            command=self._on_submit,
+            image=self.icons["unlock"],
+            compound="left",
+            state="disabled",
+        )
+        self.submit_button.grid(row=5, column=0, columnspan=3, pady=(0, 12))
+
+    def _selection_row(self, row, text, command):
+        ttk.Label(master=self, text=text, font=self.sm_font).grid(
+            row=row, column=0, sticky="w", padx=(10, 0), pady=(2, 2)
+        )
+        container = ttk.Frame(self)
+        container.grid(row=row, column=1, sticky="w")
+
+        ttk.Button(
+            master=container,
+            image=self.icons["upload"],
+            command=command,
+            bootstyle="success-outline",
+            padding=(2, 0),
+        ).grid(row=0, column=0, sticky="w", padx=(5, 10))
+
+        name_label = ttk.Label(
+            master=container,
+            font=self.mm_font,
+            foreground="#ba68c8",
+        )
+        name_label.grid(row=0, column=1, sticky="w")
+
+        return name_label
+
+    def _update_submit_state(self):
+        if self.key_path and self.token_sources and not self.running:
+            self.submit_button.config(state="normal")
+        else:
+            self.submit_button.config(state="disabled")
+
+    def _on_select_key(self):
+        key_path = fd.askopenfilename(
+            parent=self,
+            title="Select KEY File",
+            filetypes=[("PNG Images", ("*.png"))],
+        )
+        if not key_path:
+            return
+
+        self.key_path = key_path
+        self.key_name.config(text=Path(key_path).name)
+        self._update_submit_state()
+
+    def _on_select_tokens(self):
+        token_paths = fd.askopenfilenames(
+            parent=self,
+            title="Select CIPHER Files",
+            filetypes=[("PNG Images", ("*.png"))],
+        )
+        if not token_paths:
+            return
+
+        self.token_sources = list(token_paths)
+        self.token_name.config(text=f"{len(token_paths)} file(s) selected")
+        self._update_submit_state()
+
+    def _on_select_token_folder(self):
+        token_folder = fd.askdirectory(parent=self, title="Select CIPHER Folder")
+        if not token_folder:
+            return
+
+        self.token_sources = [token_folder]
+        self.token_name.config(text=f"{Path(token_folder).name}/")
+        self._update_submit_state()
+
+    def _on_select_output(self):
+        output_dir = fd.askdirectory(parent=self, title="Select OUTPUT Folder")
+        if not output_dir:
+            return
+
+        self.output_dir = output_dir
+        self.output_name.config(text=output_dir)
+
+    def _on_submit(self):
+        self.running = True
+        self._update_submit_state()
+        self.status_table.delete(*self.status_table.get_children())
+
+        bulk_decryptor = BulkDecryptor(self.key_path, self.output_dir)
+        threading.Thread(
+            target=self._run_bulk,
+            args=(bulk_decryptor, list(self.token_sources)),
+            daemon=True,
+        ).start()
+        self.poll_id = self.after(50, self._poll_results)
+
+    def _run_bulk(self, bulk_decryptor: BulkDecryptor, token_sources: list[str]):
+        # worker thread: never touches tk, only the queue
+        try:
+            for result in bulk_decryptor.decrypt_many(token_sources):
+                self.result_queue.put(result)
+        except Exception as e:
+            logger.exception(f"Bulk Decrypt Error: {e}")
+            self.result_queue.put(e)
+        finally:
+            self.result_queue.put(None)
+
+    def _poll_results(self):
+        while True:
+            try:
+                result = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if result is None:
+                self.poll_id = None
+                self.running = False
+                self._update_submit_state()
+                return
+
+            if isinstance(result, Exception):
+                self.status_table.insert(
+                    "", "end", values=(Path(self.key_path).name, "FAILED", str(result))
+                )
+                continue
+
+            self.status_table.insert(
+                "",
+                "end",
+                values=(
+                    result.token_path.name,
+                    result.status,
+                    result.output_path or result.message,
+                ),
+            )
+
+        self.poll_id = self.after(50, self._poll_results)
+
+    def _on_close(self):
+        # a running batch finishes in the background
+        if self.poll_id is not None:
+            self.after_cancel(self.poll_id)
+        self.destroy()
+
+
+class RecentPopup(ttk.Toplevel):
+    def __init__(self, load_bundle_cb):
+        super().__init__(
+            minsize=(980, 1),
+            resizable=(False, False),
+            overrideredirect=True,
+        )
+        self.config(
+            highlightthickness=2,
+            highlightbackground="#555555",
+            relief="raised",
+        )
+        self.grab_set()
+
+        # POSITION
+        self.x = (self.winfo_screenwidth() // 2) - (980 // 2)
+        self.y = (self.winfo_screenheight() // 2) - (590 // 2)
+        offset = 8
+        self.geometry(f"+{self.x + offset}+{self.y - offset}")
+
+        for _ in range(3):
+            self.rowconfigure(_, weight=1)
+        self.columnconfigure(0, weight=999)
+        self.columnconfigure(1, weight=1)
+
+        # ICONS
+        self.icons = {
+            "close": ttk.PhotoImage(file=IMG_PATH / "close.png"),
+            "unlock": ttk.PhotoImage(file=IMG_PATH / "unlock.png"),
+        }
+
+        # CLASS INSTANCES
+        self.custom_toast_notification = CustomToastNotification(self)
+
+        # VARIABLES
+        self.load_bundle_cb = load_bundle_cb
+        self.entries = {}
+
+        self.recent_label = ttk.Label(
+            master=self,
+            text="RECENT BUNDLES",
+            font=("Inter Bold", 14),
+        )
+        self.recent_label.grid(
+            row=0, column=0, sticky="nw", padx=(10, 10), pady=(12, 10)
+        )
+
+        self.close_button = ttk.Button(
+            master=self,
+            image=self.icons["close"],
+            command=lambda: self.destroy(),
+            bootstyle="primary-outline",
+            padding=0,
+        )
+        self.close_button.grid(
+            row=0, column=1, sticky="ne", padx=(10, 10), pady=(12, 10)
+        )
+
+        self.recent_table = ttk.Treeview(
+            master=self,
+            columns=("saved", "bundle", "size"),
+            show="headings",
+            height=12,
+            bootstyle="dark",
+        )
+        self.recent_table.heading("saved", text="SAVED", anchor="w")
+        self.recent_table.heading("bundle", text="BUNDLE", anchor="w")
+        self.recent_table.heading("size", text="INPUT SIZE", anchor="w")
+        self.recent_table.column("saved", width=200)
+        self.recent_table.column("bundle", width=600)
+        self.recent_table.column("size", width=140)
+        self.recent_table.grid(
+            row=1, column=0, columnspan=2, sticky="nsew", padx=(10, 10), pady=(0, 10)
+        )
+        self.recent_table.bind("<Double-1>", lambda _: self._on_load())
+
+        self.load_button = ttk.Button(
+            master=self,
+            text="LOAD",
+            command=self._on_load,
+            image=self.icons["unlock"],
+            compound="left",
+        )
+        self.load_button.grid(row=2, column=0, columnspan=2, pady=(0, 12))
+
+        self._fill_table()
+
+    def _fill_table(self):
+        try:
+            entries = CipherCatalog().recent(limit=50)
+        except Exception as e:
+            logger.exception(f"Catalog Error: {e}")
+            entries = []
+
+        for entry in entries:
+            item = self.recent_table.insert(
+                "",
+                "end",
+                values=(
+                    f"{datetime.fromisoformat(entry.saved_at):%b %d %Y, %H:%M:%S}",
+                    entry.path,
+                    f"{entry.input_size:,} bytes",
+                ),
+            )
+            self.entries[item] = entry
+
+    def _on_load(self):
+        selection = self.recent_table.selection()
+        if not selection:
+            return
+
+        entry = self.entries[selection[0]]
+        if not Path(entry.path).exists():
+            self.custom_toast_notification.show_toast("error", "Bundle missing.")
+            return
+
+        try:
+            self.load_bundle_cb(entry.path)
+        except Exception as e:
+            logger.exception(f"Bundle Load Error: {e}")
+            self.custom_toast_notification.show_toast("error", "Bad bundle.")
+            return
+
+        self.destroy()
+
+
 class SubmissionManager:
     def __init__(self):
         self.previous_submission = None
@@ -608,7 +1123,19 @@ class OutputDisplay(ttk.Frame):
         )
         self.result_container.set_autohide(True)
 
-    def display(self, text: str):
+    def _describe_binary(self, result: Envelope) -> str:
+        return (
+            f"[binary file] {result.file_name or 'unnamed'}\n"
+            f"Type: {result.mime_type or 'unknown'}\n"
+            f"Size: {len(result.payload):,} bytes\n\n"
+            "Save to restore the original file."
+        )
+
+    def display(self, result: Envelope):
+        text = result.as_text()
+        if text is None:
+            text = self._describe_binary(result)
+
         self.result_container.grid(row=0, column=0, sticky="nsew")
         self.result_container.text.delete("1.0", "end")
         self.result_container.insert(ttk.INSERT, text)
@@ -639,7 +1166,7 @@ class ButtonSet(ttk.Frame):
         self.custom_toast_notification = CustomToastNotification(master)
 
         # VARIABLES
-        self._file_content: str = ""
+        self._file_content: Envelope | None = None
 
         # BUTTONS
         self.save_button = ttk.Button(
@@ -667,22 +1194,36 @@ class ButtonSet(ttk.Frame):
         return self._file_content
 
     @file_content.setter
-    def file_content(self, new_value: str):
+    def file_content(self, new_value: Envelope):
         self._file_content = new_value
 
     def _on_save(self):
         save_file_name_path: str = ""
-        save_file_name_path = fd.asksaveasfilename(
-            defaultextension=".txt",
-            initialdir=Path.home() / "Documents" / "ciphers",
-            initialfile=f"ciphertext-{datetime.now():%b%d-%H%M%S-%f}.txt",
-            filetypes=[("Text Files", ("*.txt"))],
-        )
+        file_name = self._file_content.file_name
+
+        if file_name:
+            # uploaded files are restored under their original name
+            suffix = Path(file_name).suffix
+            save_file_name_path = fd.asksaveasfilename(
+                defaultextension=suffix,
+                initialdir=Path.home() / "Documents" / "ciphers",
+                initialfile=file_name,
+                filetypes=[("Original Type", (f"*{suffix}")), ("All Files", ("*.*"))],
+            )
+        else:
+            save_file_name_path = fd.asksaveasfilename(
+                defaultextension=".txt",
+                initialdir=Path.home() / "Documents" / "ciphers",
+                initialfile=f"ciphertext-{datetime.now():%b%d-%H%M%S-%f}.txt",
+                filetypes=[("Text Files", ("*.txt"))],
+            )
 
         if not save_file_name_path:
             return
 
-        utilities.ResultSaver(save_file_name_path).save_result(self._file_content)
+        utilities.ResultSaver(save_file_name_path, fsync=True).save_result(
+            self._file_content.iter_chunks()
+        )
 
         self.custom_toast_notification.show_toast("success", "Instance saved.")
 
@@ -700,9 +1241,11 @@ class InputDecryptor:
     def __init__(self):
         self.decryptor = Decryptor()
 
-    def execute_decrypt(self, key: str | bytes, token: str | bytes):
-        result = self.decryptor.decrypt(key=key, token=token)
-        return result.decode()
+    def execute_decrypt(
+        self, key: str | bytes, token: str | bytes, progress=None
+    ) -> Envelope:
+        # bytes stay bytes, text is only decoded for display
+        return self.decryptor.decrypt_envelope(key=key, token=token, progress=progress)
 
 
 if __name__ == "__main__":
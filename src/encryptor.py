@@ -1,5 +1,16 @@
+import logging
+import os
+from pathlib import Path
+
 from cryptography.fernet import Fernet
 
+import src.utilities as utilities
+from src.ciphers import DEFAULT_SUITE, get_suite
+from src.envelope import Envelope
+from src.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
 
 class Encryptor:
     def _create_key(self) -> bytes:
@@ -8,15 +19,124 @@ class Encryptor:
 
         return key
 
-    def _encrypt_input(self, key: bytes, input_string) -> bytes:
+    def _encrypt_input(
+        self, key: bytes, envelope: Envelope, compression: str, suite: str
+    ) -> bytes:
         # fernet used base64.urlsafe_b64encode(basic_parts + hmac)
-        f = Fernet(key)
-        token = f.encrypt(input_string.encode())
+        cipher_suite = get_suite(suite)
+        # compression is recorded inside the envelope, before encryption
+        token = cipher_suite.encrypt(key, envelope.pack(compression))
 
         return token
 
-    def encrypt(self, input_string: str) -> tuple[bytes, bytes]:
+    def encrypt(
+        self,
+        input_string: str,
+        compression: str = "auto",
+        suite: str = DEFAULT_SUITE,
+        progress=None,
+    ) -> tuple[bytes, bytes]:
+        return self.encrypt_bytes(
+            input_string.encode(),
+            compression=compression,
+            suite=suite,
+            progress=progress,
+        )
+
+    @profiled("encrypt")
+    def encrypt_bytes(
+        self,
+        data: bytes,
+        file_name: str = "",
+        mime_type: str = "",
+        compression: str = "auto",
+        suite: str = DEFAULT_SUITE,
+        progress=None,
+    ) -> tuple[bytes, bytes]:
+        reporter = utilities.as_reporter(progress)
+        reporter("encrypt", 0, len(data))
+
         key = self._create_key()
-        token = self._encrypt_input(key, input_string)
+        envelope = Envelope(data, file_name, mime_type)
+        token = self._encrypt_input(key, envelope, compression, suite)
+
+        reporter("encrypt", len(data), len(data))
 
         return key, token
+
+    def wrap_key(
+        self, data_key: bytes, recipient_key: str | bytes, suite: str = DEFAULT_SUITE
+    ) -> bytes:
+        # the data key is sealed like any other plaintext, ~100 bytes per recipient
+        return get_suite(suite).encrypt(recipient_key, data_key)
+
+    @profiled("encrypt")
+    def encrypt_for_recipients(
+        self,
+        data: bytes,
+        recipient_keys: dict[str, str | bytes],
+        file_name: str = "",
+        mime_type: str = "",
+        compression: str = "auto",
+        suite: str = DEFAULT_SUITE,
+        progress=None,
+    ) -> tuple[bytes, dict[str, bytes]]:
+        # one token for everyone, only the random data key is wrapped per recipient
+        reporter = utilities.as_reporter(progress)
+        reporter("encrypt", 0, len(data))
+
+        data_key = self._create_key()
+        envelope = Envelope(data, file_name, mime_type)
+        token = self._encrypt_input(data_key, envelope, compression, suite)
+        wrapped_keys = {
+            name: self.wrap_key(data_key, recipient_key, suite)
+            for name, recipient_key in recipient_keys.items()
+        }
+
+        reporter("encrypt", len(data), len(data))
+        return token, wrapped_keys
+
+    def encrypt_to_bundle(
+        self,
+        data: bytes,
+        bundle_path: str | Path,
+        file_name: str = "",
+        mime_type: str = "",
+        suite: str = DEFAULT_SUITE,
+        engine: utilities.PixelEngine | None = None,
+        catalog=None,
+    ) -> Path:
+        # the zip is written beside the target and renamed into place,
+        # readers never see half a bundle and a failed save leaves no .part
+        key, token = self.encrypt_bytes(data, file_name, mime_type, suite=suite)
+
+        # pooled images, saved below before the engine is used again
+        engine = engine or utilities.PixelEngine()
+        key_image, token_image = engine.encode_many([key, token])
+
+        bundle_path = Path(bundle_path)
+        bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = bundle_path.with_name(f".{bundle_path.name}.part")
+
+        try:
+            utilities.CipherSaver(
+                data, key, token, key_image, token_image, max_workers=1
+            ).save_cipher(part_path)
+            os.replace(part_path, bundle_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+
+        if catalog is not None:
+            try:
+                catalog.record(
+                    bundle_path,
+                    input_size=len(data),
+                    token_size=len(token),
+                    key_dimensions=key_image[0].size,
+                    token_dimensions=token_image[0].size,
+                )
+            except Exception as e:
+                logger.exception(f"Catalog Error: {e}")
+
+        return bundle_path
@@ -1,9 +1,12 @@
 import logging.config
-import multiprocessing as mp
+import mimetypes
+import threading
+import time
 import tkinter.filedialog as fd
 import tkinter.font as tk_font
 from datetime import datetime
 from pathlib import Path
+from queue import Empty, Queue
 
 import ttkbootstrap as ttk
 import yaml
@@ -14,7 +17,10 @@ from ttkbootstrap.style import Style
 from ttkbootstrap.toast import ToastNotification
 
 import src.utilities as utilities
+from src.catalog import CipherCatalog
+from src.cost import ROUTE_REFUSE, ROUTE_SLOW, CostModel
 from src.encryptor import Encryptor
+from src.jobs import DEFAULT_TIMEOUT, JobSupervisor
 
 config_path = Path(__file__).parent.parent / "configs" / "logging_config.yaml"
 
@@ -26,6 +32,11 @@ logger = logging.getLogger(__name__)
 
 IMG_PATH = Path(__file__).parent.parent / "assets"
 
+# milliseconds between checks on a running background job
+POLL_MS = 50
+# an upload's job timeout, as a multiple of its estimated run time
+TIMEOUT_FACTOR = 4
+
 
 class EncryptUI(ttk.Frame):
     def __init__(self, parent):
@@ -66,8 +77,21 @@ class InputManager(ttk.Frame):
         # CLASS INSTANCES
         self.custom_toast_notification = CustomToastNotification(master)
         self.input_encryptor = InputEncryptor()
+        self.cost_model = CostModel()
+        self.supervisor = JobSupervisor()
         self.image_display = ImageDisplay(master)
-        self.button_set = ButtonSet(master, reset_cb=self.reset_instance)
+        self.progress = StageProgress(
+            self,
+            on_cancel=self._on_cancel,
+            row=3,
+            column=0,
+            columnspan=3,
+            sticky="ew",
+            pady=(0, 5),
+        )
+        self.button_set = ButtonSet(
+            master, reset_cb=self.reset_instance, progress=self.progress
+        )
 
         # INSTANCE VARIABLES
         self.upload_file_path = ""
@@ -79,11 +103,13 @@ class InputManager(ttk.Frame):
         self.token_bytes: bytes = b""
 
         self.save_ready_state = False
+        self.poll_id = None
+        self.job_id = None
 
         self.input_label = ttk.Label(
             master=self,
             font=self.sm_font,
-            text="Enter string to encrypt OR upload '.txt' file for extremely long inputs.",
+            text="Enter string to encrypt OR upload a file for long or binary inputs.",
         )
         self.input_label.grid(row=0, column=0, sticky="sw")
 
@@ -162,8 +188,8 @@ class InputManager(ttk.Frame):
 
     def on_upload(self):
         self.upload_file_path = fd.askopenfilename(
-            title="Select TEXT File",
-            filetypes=[("Text Files", ("*.txt"))],
+            title="Select File",
+            filetypes=[("All Files", ("*.*")), ("Text Files", ("*.txt"))],
         )
         if not self.upload_file_path:
             return
@@ -250,76 +276,131 @@ class InputManager(ttk.Frame):
 
             return True
 
-        def execute_process(process: mp.Process):
+        def execute_job(*args, timeout: float | None = None):
             try:
-                process.start()
+                self.job_id = self.supervisor.submit(
+                    self.input_encryptor.encrypt, *args, timeout=timeout
+                )
             except Exception as e:
                 logger.exception(f"Error: {e}")
             else:
                 self.old_input = self.input_string
+                # the ui keeps running, results arrive through _poll_encrypt
+                self.submit_button.config(state="disabled")
+                self.progress.cancellable = True
+                self.poll_id = self.after(POLL_MS, self._poll_encrypt)
 
-                self.key_bytes, self.token_bytes = queue.get()
-
-                self.image_display.display_image(
-                    self.key_bytes,
-                    self.token_bytes,
-                    self.button_set,
-                )
-                # queue results needed for saving this instance
-                self.button_set.key = self.key_bytes
-                self.button_set.token = self.token_bytes
-
-                self.custom_toast_notification.show_toast("success", "Input encrypted.")
-
-                self.save_ready_state = True
-            finally:
-                process.join()
-                logger.info("Input processed.")
-
-        process = None
-        queue = mp.Queue()
         self.input_string = self.input_entry.text.get("1.0", "end-1c").strip()
 
         if validate_input(self.input_string):
             self.button_set.input = self.input_string
 
-            process = mp.Process(
-                target=self.input_encryptor.encrypt,
-                args=(self.input_string, queue),
-            )
-
             try:
-                execute_process(process)
+                execute_job(self.input_string)
             except Exception as e:
                 logger.exception(f"Error: {e}")
-            else:
-                if self.save_ready_state:
-                    self.button_set.display_buttons()
             finally:
-                logger.info("Input string encrypted.")
-                self.save_ready_state = False
+                logger.info("Input string submitted.")
 
         if self.upload_state:
             try:
-                with open(self.upload_file_path, encoding="utf-8") as tf:
-                    self.upload_content = tf.read()
-                    self.button_set.input = self.upload_content
+                file_name = Path(self.upload_file_path).name
+                mime_type = mimetypes.guess_type(file_name)[0] or ""
 
-                process = mp.Process(
-                    target=self.input_encryptor.encrypt,
-                    args=(self.upload_content, queue),
+                # admission check from the file size, before anything is read
+                estimate = self.cost_model.estimate(
+                    Path(self.upload_file_path).stat().st_size, file_name, mime_type
                 )
+                message = self.cost_model.describe(estimate)
+                logger.info(f"Upload estimate: {estimate}")
+
+                if estimate.route == ROUTE_REFUSE:
+                    logger.warning(f"Upload refused. {message}")
+                    self.custom_toast_notification.show_toast("error", message)
+                    return
+                if estimate.route == ROUTE_SLOW:
+                    self.custom_toast_notification.show_toast("info", message)
+
+                # raw bytes, no text decoding, so any file type works
+                self.upload_content = utilities.read_file(
+                    self.upload_file_path, self._on_read_progress
+                )
+                self.button_set.input = self.upload_content
 
-                execute_process(process)
+                execute_job(
+                    self.upload_content,
+                    file_name,
+                    mime_type,
+                    timeout=max(DEFAULT_TIMEOUT, estimate.seconds * TIMEOUT_FACTOR),
+                )
             except Exception as e:
                 logger.exception(f"Error reading uploaded file: {e}")
+                self.progress.finish()
                 self.custom_toast_notification.show_toast("error", "Bad File.")
-            else:
-                if self.save_ready_state:
-                    self.button_set.display_buttons()
             finally:
-                logger.info("Uploaded file encrypted.")
-                self.save_ready_state = False
+                logger.info("Uploaded file submitted.")
+
+    def _on_read_progress(self, stage: str, done: int, total: int):
+        # the read runs on the tk thread, so repaint the bar by hand
+        self.progress.update_stage(stage, done, total)
+        self.update_idletasks()
+
+    def _on_cancel(self):
+        if self.job_id is not None and self.supervisor.cancel(self.job_id):
+            self.custom_toast_notification.show_toast("info", "Cancelling.")
+
+    def _poll_encrypt(self):
+        # the supervisor handles timeouts, crashes and worker recycling
+        for event in self.supervisor.poll():
+            if event.job_id != self.job_id:
+                continue
+
+            match event.kind:
+                case "progress":
+                    self.progress.update_stage(*event.payload)
+                case "result":
+                    self._on_encrypted(*event.payload)
+                    return
+                case "cancelled":
+                    self._on_job_end()
+                    self.custom_toast_notification.show_toast(
+                        "info", "Encryption cancelled."
+                    )
+                    return
+                case _:
+                    self._on_job_end()
+                    logger.error(f"Encrypt job failed: {event.payload}")
+                    self.custom_toast_notification.show_toast("error", event.payload)
+                    return
+
+        self.poll_id = self.after(POLL_MS, self._poll_encrypt)
+
+    def _on_job_end(self):
+        self.job_id = None
+        self.poll_id = None
+        self.old_input = ""
+        self.progress.finish()
+        self.submit_button.config(state="normal")
+        logger.info("Input processed.")
+
+    def _on_encrypted(self, key: bytes, token: bytes, key_image, token_image):
+        self._on_job_end()
+        self.old_input = self.input_string
+        self.key_bytes, self.token_bytes = key, token
+
+        self.image_display.display_image(
+            key_image,
+            token_image,
+            self.button_set,
+        )
+        # queue results needed for saving this instance
+        self.button_set.key = self.key_bytes
+        self.button_set.token = self.token_bytes
+
+        self.custom_toast_notification.show_toast("success", "Input encrypted.")
+
+        self.save_ready_state = True
+        self.button_set.display_buttons()
 
     def reset_instance(self):
         def clear_children(frame: ttk.Frame):
@@ -341,15 +422,30 @@ class InputEncryptor:
     def __init__(self):
         self.encryptor = Encryptor()
 
-    def encrypt(self, input_string, queue: mp.Queue):
+    def encrypt(
+        self,
+        input_data: str | bytes,
+        file_name: str = "",
+        mime_type: str = "",
+        progress=None,
+    ) -> tuple[bytes, bytes, tuple[Image.Image, int], tuple[Image.Image, int]]:
+        # runs in the job worker, errors go back to the ui through the supervisor,
+        # the images are built here too so the pixel stage reports through it
         try:
-            key, token = self.encryptor.encrypt(input_string)
-        except Exception as e:
-            logger.exception(f"Input Error: {e}")
-            queue.put((None, None))
-            return
-        else:
-            queue.put((key, token))
+            if isinstance(input_data, bytes):
+                key, token = self.encryptor.encrypt_bytes(
+                    input_data, file_name, mime_type, progress=progress
+                )
+            else:
+                key, token = self.encryptor.encrypt(input_data, progress=progress)
+
+            # the key image is a few pixels, only the token build is reported
+            key_image = utilities.ArrayUtil(key).transform_array_image()
+            token_image = utilities.ArrayUtil(
+                token, progress=progress
+            ).transform_array_image()
+
+            return key, token, key_image, token_image
         finally:
             logger.info("Input process attempted.")
 
@@ -383,19 +479,16 @@ class ImageDisplay(ttk.Frame):
         self.cipher_label = ttk.Label(self, text="CIPHER", font=self.md_font)
         self.cipher_image = ttk.Label(self)
 
-    def _prep_image(self, data):
-        arr_util = utilities.ArrayUtil(data)
-        image = arr_util.transform_array_image()
+    def _preview(self, image):
+        return image[0].resize((400, 400), resample=Image.NEAREST)
 
-        resized_image = image[0].resize((400, 400), resample=Image.NEAREST)
+    def display_image(self, key_image, token_image, button_set_instance):
+        # images come built from the job worker, photo images are made here
+        key_preview = self._preview(key_image)
+        token_preview = self._preview(token_image)
 
-        tk_image = ImageTk.PhotoImage(resized_image)
-
-        return image, tk_image
-
-    def display_image(self, key_bytes, token_bytes, button_set_instance):
-        key_image, self.key_pi = self._prep_image(key_bytes)
-        token_image, self.token_pi = self._prep_image(token_bytes)
+        self.key_pi = ImageTk.PhotoImage(key_preview)
+        self.token_pi = ImageTk.PhotoImage(token_preview)
         self.bs_instance = button_set_instance
         self.bs_instance.key_image = key_image
         self.bs_instance.token_image = token_image
@@ -588,10 +681,11 @@ class OutputBox(ttk.Frame):
 
 
 class ButtonSet(ttk.Frame):
-    def __init__(self, master: ttk.Frame, reset_cb):
+    def __init__(self, master: ttk.Frame, reset_cb, progress=None):
         super().__init__(master)
         self.grid(row=2, column=0, sticky="nsew", padx=(2, 2))
         self.reset_callback = reset_cb
+        self.progress = progress
 
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
@@ -699,15 +793,59 @@ class ButtonSet(ttk.Frame):
         if not save_file_name_path:
             return
 
-        utilities.CipherSaver(
+        save_queue = Queue()
+        saver = utilities.CipherSaver(
             self._input,
             self._key,
             self._token,
             self._key_image,
             self._token_image,
-        ).save_cipher(save_file_name_path)
+            catalog=CipherCatalog(),
+            progress=lambda *report: save_queue.put(("progress", *report)),
+        )
+
+        self.save_button.config(state="disabled")
+        threading.Thread(
+            target=self._save_worker,
+            args=(saver, save_file_name_path, save_queue),
+        ).start()
+        self.after(POLL_MS, self._poll_save, save_queue)
+
+    def _save_worker(self, saver, save_file_name_path: str, save_queue: Queue):
+        # worker thread: never touches tk, only the queue,
+        # save_cipher raises when the bundle was not fully written
+        try:
+            saver.save_cipher(save_file_name_path)
+        except Exception as e:
+            logger.exception(f"Save Error: {e}")
+            save_queue.put(("result", False))
+        else:
+            save_queue.put(("result", True))
 
-        self.custom_toast_notification.show_toast("success", "Instance saved.")
+    def _poll_save(self, save_queue: Queue):
+        try:
+            while True:
+                message = save_queue.get_nowait()
+                if message[0] == "progress":
+                    if self.progress is not None:
+                        self.progress.update_stage(*message[1:])
+                else:
+                    self._on_saved(message[1])
+                    return
+        except Empty:
+            pass
+
+        self.after(POLL_MS, self._poll_save, save_queue)
+
+    def _on_saved(self, is_saved: bool):
+        if self.progress is not None:
+            self.progress.finish()
+        self.save_button.config(state="normal")
+
+        if is_saved:
+            self.custom_toast_notification.show_toast("success", "Instance saved.")
+        else:
+            self.custom_toast_notification.show_toast("error", "Save failed.")
 
     def _on_reset(self):
         self.reset_callback()
@@ -724,8 +862,85 @@ class ButtonSet(ttk.Frame):
         self.view_button.grid(row=0, column=2, sticky="se")
 
 
+class StageProgress(ttk.Frame):
+    # stage name and percent bar, only on screen while a job reports progress
+    STAGE_LABELS = {
+        "read": "READING",
+        "encrypt": "ENCRYPTING",
+        "pixel": "BUILDING",
+        "png": "ENCODING",
+        "zip": "ZIPPING",
+        "decode": "DECODING",
+        "decrypt": "DECRYPTING",
+    }
+
+    def __init__(self, master, on_cancel=None, **grid_options):
+        super().__init__(master)
+        self.grid_options = grid_options
+        self.on_cancel = on_cancel
+        # set by the owner while the running job can be cancelled
+        self.cancellable = False
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=999)
+
+        self.stage_label = ttk.Label(
+            master=self,
+            font=("Inter Regular", 10),
+            width=12,
+        )
+        self.stage_label.grid(row=0, column=0, sticky="w")
+
+        self.bar = ttk.Progressbar(
+            master=self,
+            bootstyle="success-striped",
+            maximum=100,
+        )
+        self.bar.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+
+        self.cancel_button = ttk.Button(
+            master=self,
+            text="CANCEL",
+            command=self._on_cancel,
+            bootstyle="danger-outline",
+            padding=(4, 0),
+            takefocus=0,
+        )
+
+    def _on_cancel(self):
+        if self.on_cancel is not None:
+            self.on_cancel()
+
+    def update_stage(self, stage: str, done: int, total: int):
+        self.grid(**self.grid_options)
+        self.stage_label.config(text=self.STAGE_LABELS.get(stage, stage.upper()))
+        self.bar.config(value=100 * done / total if total else 100)
+
+        if self.cancellable and self.on_cancel is not None:
+            self.cancel_button.grid(row=0, column=2, sticky="e", padx=(5, 0))
+        else:
+            self.cancel_button.grid_remove()
+
+    def finish(self):
+        self.cancellable = False
+        self.cancel_button.grid_remove()
+        self.grid_remove()
+
+
 class CustomToastNotification(ToastNotification):
+    # one pooled toplevel shared by every instance, updated in place
     ACTIVE_TOAST = None
+    TOPLEVEL = None
+    LABELS = {}
+    CURRENT = None
+    HIDE_ID = None
+    FADE_ID = None
+    FADE_START = 0.0
+
+    # fade timing, capped at ~60 frames per second
+    FADE_SECONDS = 0.25
+    FRAME_MS = 16
 
     def __init__(self, parent: ttk.Frame):
         # used to compute toast pos relative to parent size and pos
@@ -749,30 +964,13 @@ class CustomToastNotification(ToastNotification):
         self.message_font = ("Inter Regular", 11)
         self.char_length = 0
         self.duration = 0
-        self.toplevel = None
-
-    def show_toast(self, custom_style: str, message: str):
-        if CustomToastNotification.ACTIVE_TOAST is not None:
-            CustomToastNotification.ACTIVE_TOAST.toplevel.destroy()
-
-        # build toast
-        self.toplevel = ttk.Toplevel()
-        CustomToastNotification.ACTIVE_TOAST = self
-        self._setup()
-
-        self.container = ttk.Frame(self.toplevel)
-        self.container.pack(fill="both", expand=1)
 
-        style = Style()
-        style.configure("custom.TFrame", background="#FAFAFA")
-        self.container.configure(style="custom.TFrame")
-
-        self.message = message
-        self.char_length = len(self.title) + len(self.message)
-        self.duration = min(max((self.char_length * 50), 1000), 2000)
+    @property
+    def toplevel(self):
+        return CustomToastNotification.TOPLEVEL
 
-        fg_color = "#1B1B1B"
-        bg_color = "#FAFAFA"
+    def show_toast(self, custom_style: str, message: str):
+        cls = CustomToastNotification
 
         match custom_style:
             case "success":
@@ -791,62 +989,132 @@ class CustomToastNotification(ToastNotification):
                 self.title = "UNKNOWN"
                 self.icon = "dot_default"
 
+        self.message = message
+        self.char_length = len(self.title) + len(self.message)
+        self.duration = min(max((self.char_length * 50), 1000), 2000)
+
+        # a burst of the same toast only extends the visible one
+        if cls.CURRENT == (custom_style, message) and cls.FADE_ID is None:
+            self._schedule_hide()
+            return
+
+        if cls.TOPLEVEL is None or not cls.TOPLEVEL.winfo_exists():
+            self._build()
+
+        self._cancel_pending()
+
+        # keep a reference, the shared labels use this instance's icons
+        cls.ACTIVE_TOAST = self
+        cls.CURRENT = (custom_style, message)
+        cls.LABELS["icon"].config(image=self.icons[self.icon])
+        cls.LABELS["title"].config(text=self.title)
+        cls.LABELS["message"].config(text=self.message)
+
+        self._set_geometry()
+        cls.TOPLEVEL.attributes("-alpha", 1.0)
+        cls.TOPLEVEL.deiconify()
+        cls.TOPLEVEL.lift()
+
+        self._schedule_hide()
+
+    def _build(self):
+        cls = CustomToastNotification
+
+        fg_color = "#1B1B1B"
+        bg_color = "#FAFAFA"
+
+        cls.TOPLEVEL = ttk.Toplevel()
+        self._setup()
+
+        container = ttk.Frame(cls.TOPLEVEL)
+        container.pack(fill="both", expand=1)
+
+        style = Style()
+        style.configure("custom.TFrame", background=bg_color)
+        container.configure(style="custom.TFrame")
+
         # image label
-        ttk.Label(
-            self.container,
-            image=self.icons[self.icon],
+        cls.LABELS["icon"] = ttk.Label(
+            container,
             background=bg_color,
             anchor="center",
-        ).grid(row=0, column=0, rowspan=2, sticky="nsew", padx=(10, 0))
+        )
+        cls.LABELS["icon"].grid(row=0, column=0, rowspan=2, sticky="nsew", padx=(10, 0))
 
         # title label
-        ttk.Label(
-            self.container,
-            # text=self.title,
-            text=self.title,
+        cls.LABELS["title"] = ttk.Label(
+            container,
             font=self.title_font,
             foreground=fg_color,
             background=bg_color,
             anchor="nw",
-        ).grid(row=0, column=1, sticky="nsew", padx=10, pady=(5, 0))
+        )
+        cls.LABELS["title"].grid(row=0, column=1, sticky="nsew", padx=10, pady=(5, 0))
 
         # message label
-        ttk.Label(
-            self.container,
-            text=self.message,
+        cls.LABELS["message"] = ttk.Label(
+            container,
             font=self.message_font,
             foreground=fg_color,
             background=bg_color,
             anchor="nw",
-        ).grid(row=1, column=1, sticky="nsew", padx=10, pady=(0, 5))
+        )
+        cls.LABELS["message"].grid(row=1, column=1, sticky="nsew", padx=10, pady=(0, 5))
+
+        cls.TOPLEVEL.bind("<ButtonPress>", lambda _: cls.ACTIVE_TOAST._hide_toast())
+
+    def _cancel_pending(self):
+        cls = CustomToastNotification
+
+        for after_id in (cls.HIDE_ID, cls.FADE_ID):
+            if after_id is not None:
+                cls.TOPLEVEL.after_cancel(after_id)
+        cls.HIDE_ID = None
+        cls.FADE_ID = None
+
+    def _schedule_hide(self):
+        cls = CustomToastNotification
 
-        self.toplevel.bind("<ButtonPress>", self._hide_toast)
+        if cls.HIDE_ID is not None:
+            cls.TOPLEVEL.after_cancel(cls.HIDE_ID)
 
         # specified duration to close
-        if self.duration:
-            self.toplevel.after(self.duration, self._hide_toast)
+        cls.HIDE_ID = cls.TOPLEVEL.after(self.duration, self._hide_toast)
 
     def _hide_toast(self, *_):
+        cls = CustomToastNotification
+
+        self._cancel_pending()
+        cls.FADE_START = time.monotonic()
+        self._fade_step()
+
+    def _fade_step(self):
+        cls = CustomToastNotification
+
         try:
-            alpha = float(self.toplevel.attributes("-alpha"))
+            # alpha follows elapsed time, so slow frames do not stretch the fade
+            elapsed = time.monotonic() - cls.FADE_START
+            alpha = 1.0 - (elapsed / cls.FADE_SECONDS)
+
             if alpha <= 0:
-                self.toplevel.destroy()
-                CustomToastNotification.ACTIVE_TOAST = None
+                cls.TOPLEVEL.withdraw()
+                cls.FADE_ID = None
+                cls.CURRENT = None
             else:
-                self.toplevel.attributes("-alpha", alpha - 0.01)
-                self.toplevel.after(1, self._hide_toast)
+                cls.TOPLEVEL.attributes("-alpha", alpha)
+                cls.FADE_ID = cls.TOPLEVEL.after(cls.FRAME_MS, self._fade_step)
         except Exception:
-            if self.toplevel:
-                self.toplevel.destroy()
-                CustomToastNotification.ACTIVE_TOAST = None
+            if cls.TOPLEVEL:
+                cls.TOPLEVEL.destroy()
+                cls.TOPLEVEL = None
+                cls.FADE_ID = None
+                cls.CURRENT = None
 
     def _setup(self):
         # toplevel configs
         self.toplevel.overrideredirect(True)
         self.toplevel.configure(relief="raised")
 
-        self._set_geometry()
-
     def _set_geometry(self):
         self.toplevel.update_idletasks()  # actualize geometry
 
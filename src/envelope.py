@@ -0,0 +1,168 @@
+import bz2
+import logging
+import lzma
+import struct
+import zlib
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+# plaintext envelope header:
+# v1: MAGIC | version | codec
+# v2: MAGIC | version | codec | name length | mime length | name | mime
+MAGIC = b"\x00SPN"
+VERSION = 2
+HEADER_V2 = struct.Struct(">BBHH")
+
+CODECS = {
+    "none": 0,
+    "zlib": 1,
+    "bz2": 2,
+    "lzma": 3,
+}
+
+# inputs below this size are never compressed
+MIN_COMPRESS_SIZE = 256
+SAMPLE_CHUNK_SIZE = 16384
+# a codec must shrink the sample below this ratio to be picked
+MAX_COMPRESS_RATIO = 0.9
+# payload slice size handed to streaming writers
+CHUNK_SIZE = 1024 * 1024
+# lzma preset 6 reserves an 8 MiB dictionary (~94 MiB of encoder state),
+# the dictionary is capped to the input so small inputs stay cheap
+LZMA_PRESET = 6
+LZMA_MAX_DICT_SIZE = 8 * 1024 * 1024
+LZMA_MIN_DICT_SIZE = 4096
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    match codec:
+        case "zlib":
+            return zlib.compress(data, 6)
+        case "bz2":
+            return bz2.compress(data, 9)
+        case "lzma":
+            dict_size = min(LZMA_MAX_DICT_SIZE, max(LZMA_MIN_DICT_SIZE, len(data)))
+            filters = [
+                {"id": lzma.FILTER_LZMA2, "preset": LZMA_PRESET, "dict_size": dict_size}
+            ]
+            return lzma.compress(data, filters=filters)
+        case _:
+            return data
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    match codec:
+        case "zlib":
+            return zlib.decompress(data)
+        case "bz2":
+            return bz2.decompress(data)
+        case "lzma":
+            return lzma.decompress(data)
+        case _:
+            return data
+
+
+class Envelope:
+    def __init__(self, payload: bytes, file_name: str = "", mime_type: str = ""):
+        self.payload = payload
+        self.file_name = file_name
+        self.mime_type = mime_type
+        self.codec = "none"
+
+    def as_text(self) -> str | None:
+        # None when the payload is not utf-8 text
+        if self.mime_type and not self.mime_type.startswith("text/"):
+            return None
+
+        try:
+            return self.payload.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+        # zero-copy views over the payload, for streaming writers
+        view = memoryview(self.payload)
+        for start in range(0, len(view), chunk_size):
+            yield view[start : start + chunk_size]
+
+    def _sample(self) -> bytes:
+        # head, middle and tail, so one odd region does not decide the codec
+        size = len(self.payload)
+        if size <= SAMPLE_CHUNK_SIZE * 3:
+            return self.payload
+
+        middle = (size - SAMPLE_CHUNK_SIZE) // 2
+        return b"".join(
+            (
+                self.payload[:SAMPLE_CHUNK_SIZE],
+                self.payload[middle : middle + SAMPLE_CHUNK_SIZE],
+                self.payload[-SAMPLE_CHUNK_SIZE:],
+            )
+        )
+
+    def _select_codec(self) -> str:
+        if len(self.payload) < MIN_COMPRESS_SIZE:
+            return "none"
+
+        sample = self._sample()
+        best_codec, best_size = "none", len(sample) * MAX_COMPRESS_RATIO
+
+        # ordered fastest first, slower codecs must win outright
+        for codec in ("zlib", "bz2", "lzma"):
+            compressed_size = len(_compress(codec, sample))
+            if compressed_size < best_size:
+                best_codec, best_size = codec, compressed_size
+
+        return best_codec
+
+    def pack(self, compression: str = "auto") -> bytes:
+        codec = self._select_codec() if compression == "auto" else compression
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression: {compression}")
+
+        body = _compress(codec, self.payload)
+        if codec != "none" and len(body) >= len(self.payload):
+            codec, body = "none", self.payload
+
+        self.codec = codec
+        logger.info("Envelope packed with %s compression.", codec)
+
+        file_name = self.file_name.encode()
+        mime_type = self.mime_type.encode()
+        header = HEADER_V2.pack(VERSION, CODECS[codec], len(file_name), len(mime_type))
+
+        return b"".join((MAGIC, header, file_name, mime_type, body))
+
+    @classmethod
+    def unpack(cls, blob: bytes) -> "Envelope":
+        # plaintexts encrypted before the envelope existed have no header
+        if not blob.startswith(MAGIC):
+            return cls(blob)
+
+        file_name, mime_type = "", ""
+        version = blob[len(MAGIC)]
+
+        if version == 1:
+            header_size = len(MAGIC) + 2
+            codec_id = blob[len(MAGIC) + 1]
+        elif version == 2:
+            _, codec_id, name_size, mime_size = HEADER_V2.unpack_from(blob, len(MAGIC))
+            name_start = len(MAGIC) + HEADER_V2.size
+            mime_start = name_start + name_size
+            header_size = mime_start + mime_size
+            file_name = blob[name_start:mime_start].decode()
+            mime_type = blob[mime_start:header_size].decode()
+        else:
+            raise ValueError(f"Unsupported envelope version: {version}")
+
+        codec = next(
+            (name for name, number in CODECS.items() if number == codec_id), None
+        )
+        if codec is None:
+            raise ValueError(f"Unknown envelope codec: {codec_id}")
+
+        envelope = cls(_decompress(codec, blob[header_size:]), file_name, mime_type)
+        envelope.codec = codec
+
+        return envelope
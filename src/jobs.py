@@ -0,0 +1,272 @@
+import logging
+import multiprocessing as mp
+import sys
+import time
+from collections import deque
+from queue import Empty
+from typing import Any, NamedTuple
+
+from src.cost import MEMORY_BUDGET
+
+try:
+    import resource
+except ImportError:
+    # windows, the rss limit is not enforced there
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# seconds a job may run before its worker is killed
+DEFAULT_TIMEOUT = 120.0
+# seconds a cancelled job gets to stop on its own before the worker is killed
+CANCEL_GRACE = 2.0
+# a worker is replaced after this many jobs or once its peak rss passes the limit
+MAX_TASKS_PER_WORKER = 50
+MAX_WORKER_RSS = MEMORY_BUDGET
+# seconds a recycled worker gets to exit before it is terminated
+SHUTDOWN_GRACE = 1.0
+
+# no job is cancelled
+NO_JOB = -1
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobEvent(NamedTuple):
+    # kind: progress, result, error or cancelled
+    job_id: int
+    kind: str
+    payload: Any
+    rss: int = 0
+
+
+class CancelToken:
+    # shared between the supervisor and its worker, checked between stages
+    def __init__(self, job_id: int, cancel_id):
+        self.job_id = job_id
+        self.cancel_id = cancel_id
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancel_id.value == self.job_id
+
+    def raise_if_cancelled(self):
+        if self.is_cancelled:
+            raise JobCancelled(f"Job {self.job_id} cancelled.")
+
+
+class Job:
+    def __init__(self, job_id: int, func, args: tuple, kwargs: dict, timeout: float):
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.started_at = None
+        self.cancelled_at = None
+
+
+def _peak_rss() -> int:
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macos, kilobytes everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _worker_main(task_queue, event_queue, cancel_id):
+    # runs in the worker process until it gets None
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        job_id, func, args, kwargs = task
+        token = CancelToken(job_id, cancel_id)
+
+        def report(stage: str, done: int, total: int):
+            # every reported stage is a cancellation point
+            token.raise_if_cancelled()
+            event_queue.put(JobEvent(job_id, "progress", (stage, done, total)))
+
+        try:
+            token.raise_if_cancelled()
+            result = func(*args, progress=report, **kwargs)
+        except JobCancelled:
+            event_queue.put(JobEvent(job_id, "cancelled", None, _peak_rss()))
+        except Exception as e:
+            logger.exception(f"Job Error: {e}")
+            message = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            event_queue.put(JobEvent(job_id, "error", message, _peak_rss()))
+        else:
+            event_queue.put(JobEvent(job_id, "result", result, _peak_rss()))
+
+
+class JobSupervisor:
+    # one reusable worker process, jobs run one at a time in submit order,
+    # the owner calls poll() periodically, nothing here ever blocks
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_tasks: int = MAX_TASKS_PER_WORKER,
+        max_rss: int = MAX_WORKER_RSS,
+        cancel_grace: float = CANCEL_GRACE,
+    ):
+        self.timeout = timeout
+        self.max_tasks = max_tasks
+        self.max_rss = max_rss
+        self.cancel_grace = cancel_grace
+
+        self._worker = None
+        self._task_queue = None
+        self._event_queue = None
+        self._cancel_id = None
+        self._tasks_done = 0
+
+        self._next_id = 0
+        self._pending = deque()
+        self._cancelled = []
+        self._job = None
+
+    @property
+    def busy(self) -> bool:
+        return self._job is not None or bool(self._pending)
+
+    def _start_worker(self):
+        # fresh queues too, a killed worker can leave a queue half written
+        self._task_queue = mp.Queue()
+        self._event_queue = mp.Queue()
+        self._cancel_id = mp.Value("q", NO_JOB)
+        self._worker = mp.Process(
+            target=_worker_main,
+            args=(self._task_queue, self._event_queue, self._cancel_id),
+            daemon=True,
+        )
+        self._worker.start()
+        self._tasks_done = 0
+        logger.info("Job worker %d started.", self._worker.pid)
+
+    def _stop_worker(self, kill: bool = False):
+        if self._worker is None:
+            return
+
+        if not kill and self._worker.is_alive():
+            self._task_queue.put(None)
+            self._worker.join(SHUTDOWN_GRACE)
+
+        if self._worker.is_alive():
+            self._worker.terminate()
+            self._worker.join()
+
+        logger.info(
+            "Job worker %d stopped (exit code %s).",
+            self._worker.pid,
+            self._worker.exitcode,
+        )
+        self._worker = None
+
+    def _start_next(self):
+        if self._job is not None or not self._pending:
+            return
+
+        if self._worker is None or not self._worker.is_alive():
+            self._stop_worker(kill=True)
+            self._start_worker()
+
+        job = self._pending.popleft()
+        job.started_at = time.monotonic()
+        self._job = job
+        self._task_queue.put((job.job_id, job.func, job.args, job.kwargs))
+
+    def submit(self, func, *args, timeout: float | None = None, **kwargs) -> int:
+        # func must be picklable and accept a progress keyword argument
+        self._next_id += 1
+        job = Job(self._next_id, func, args, kwargs, timeout or self.timeout)
+        self._pending.append(job)
+        self._start_next()
+
+        return job.job_id
+
+    def cancel(self, job_id: int) -> bool:
+        for job in self._pending:
+            if job.job_id == job_id:
+                self._pending.remove(job)
+                self._cancelled.append(job_id)
+                return True
+
+        if self._job is None or self._job.job_id != job_id:
+            return False
+
+        # cooperative first, the worker is killed only after the grace period
+        self._job.cancelled_at = time.monotonic()
+        self._cancel_id.value = job_id
+        return True
+
+    def _finish(self, event: JobEvent):
+        self._job = None
+        self._tasks_done += 1
+
+        if self._tasks_done >= self.max_tasks:
+            logger.info("Recycling job worker after %d jobs.", self._tasks_done)
+            self._stop_worker()
+        elif self.max_rss and resource is not None and event.rss > self.max_rss:
+            logger.warning("Recycling job worker, peak rss %d bytes.", event.rss)
+            self._stop_worker()
+
+    def _abort(self, message: str, kind: str = "error") -> JobEvent:
+        # the worker is in an unknown state, kill it and fail the job
+        event = JobEvent(self._job.job_id, kind, message)
+        logger.error(f"Job {self._job.job_id} aborted: {message}")
+        self._stop_worker(kill=True)
+        self._job = None
+
+        return event
+
+    def poll(self) -> list[JobEvent]:
+        events = [JobEvent(job_id, "cancelled", None) for job_id in self._cancelled]
+        self._cancelled.clear()
+
+        if self._job is None:
+            self._start_next()
+            return events
+
+        # checked before draining, a result put just before exit is still read
+        is_alive = self._worker.is_alive()
+
+        try:
+            while self._job is not None:
+                event = self._event_queue.get_nowait()
+                if event.job_id != self._job.job_id:
+                    continue
+
+                events.append(event)
+                if event.kind != "progress":
+                    self._finish(event)
+        except Empty:
+            pass
+
+        if self._job is not None:
+            job = self._job
+            now = time.monotonic()
+
+            if not is_alive:
+                exit_code = self._worker.exitcode
+                events.append(self._abort(f"Worker crashed (exit code {exit_code})."))
+            elif now - job.started_at > job.timeout:
+                events.append(self._abort(f"Timed out after {job.timeout:.0f}s."))
+            elif job.cancelled_at and now - job.cancelled_at > self.cancel_grace:
+                events.append(self._abort("Cancelled.", kind="cancelled"))
+
+        self._start_next()
+        return events
+
+    def shutdown(self):
+        self._pending.clear()
+        if self._job is not None:
+            self._stop_worker(kill=True)
+            self._job = None
+        else:
+            self._stop_worker()
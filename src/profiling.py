@@ -0,0 +1,229 @@
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# SIFRPN_PROFILE=DIR turns profiling on for every entry point,
+# the app and the CLIs also take --profile DIR and --profile-every N
+PROFILE_ENV = "SIFRPN_PROFILE"
+PROFILE_EVERY_ENV = "SIFRPN_PROFILE_EVERY"
+
+# lines in the text report: allocation sites and functions by cumulative time
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 25
+# stack frames kept per traced allocation
+TRACE_FRAMES = 10
+
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class Profiler:
+    # writes <stamp>-<pid>-<seq>-<operation>.prof and .txt per sampled operation
+    def __init__(self, directory: str | Path, every: int = 1):
+        self.directory = Path(directory)
+        self.every = max(1, every)
+
+        self._counts = {}
+        self._count_lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        # cprofile and tracemalloc are process wide, one operation at a time,
+        # nested or concurrent operations run unprofiled meanwhile
+        self._active = threading.Lock()
+
+    def _is_sampled(self, operation: str) -> bool:
+        # counted per operation so a frequent validate cannot starve encrypt
+        with self._count_lock:
+            count = self._counts.get(operation, 0)
+            self._counts[operation] = count + 1
+
+        return count % self.every == 0
+
+    def run(self, operation: str, func, *args, **kwargs):
+        if not self._is_sampled(operation):
+            return func(*args, **kwargs)
+        if not self._active.acquire(blocking=False):
+            return func(*args, **kwargs)
+
+        try:
+            return self._profile(operation, func, args, kwargs)
+        finally:
+            self._active.release()
+
+    def _profile(self, operation: str, func, args, kwargs):
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+
+        # cprofile sees the calling thread only, pool work shows up as waits,
+        # tracemalloc counts allocations from every thread
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler already owns the interpreter, memory only
+            profile = None
+
+        error = ""
+        started_at = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = time.perf_counter() - started_at
+            if profile is not None:
+                profile.disable()
+
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            if not was_tracing:
+                tracemalloc.stop()
+
+            try:
+                self._write(operation, profile, before, after, seconds, peak, error)
+            except Exception as e:
+                # a failed report must never fail the operation itself
+                logger.exception(f"Profile Error: {e}")
+
+    def _write(
+        self,
+        operation: str,
+        profile: cProfile.Profile | None,
+        before: tracemalloc.Snapshot,
+        after: tracemalloc.Snapshot,
+        seconds: float,
+        peak: int,
+        error: str,
+    ):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        base_name = f"{stamp}-{os.getpid()}-{next(self._sequence):04d}-{operation}"
+
+        lines = [
+            f"operation: {operation}",
+            f"seconds: {seconds:.4f}",
+            f"peak traced memory: {peak / (1024 * 1024):.1f} MiB",
+        ]
+        if error:
+            lines.append(f"error: {error}")
+
+        # allocations made during the operation and still alive at its end
+        lines += ["", f"top {TOP_ALLOCATIONS} allocation sites (retained):"]
+        stats = after.filter_traces(TRACE_FILTERS).compare_to(
+            before.filter_traces(TRACE_FILTERS), "lineno"
+        )
+        lines += [str(stat) for stat in stats[:TOP_ALLOCATIONS]]
+
+        if profile is not None:
+            profile_path = self.directory / f"{base_name}.prof"
+            profile.dump_stats(profile_path)
+
+            stream = io.StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(
+                TOP_FUNCTIONS
+            )
+            lines += ["", f"profile: {profile_path.name}", stream.getvalue()]
+
+        report_path = self.directory / f"{base_name}.txt"
+        report_path.write_text("\n".join(lines), encoding="utf-8")
+
+        logger.info("Profiled %s in %.3fs: %s", operation, seconds, report_path)
+
+
+_profiler = None
+
+
+def enable(directory: str | Path, every: int = 1) -> Profiler:
+    global _profiler
+
+    directory = Path(directory).resolve()
+    _profiler = Profiler(directory, every)
+
+    # job workers are separate processes, they pick this up at import
+    os.environ[PROFILE_ENV] = str(directory)
+    os.environ[PROFILE_EVERY_ENV] = str(_profiler.every)
+
+    logger.info("Profiling 1 in %d operations into %s.", _profiler.every, directory)
+    return _profiler
+
+
+def disable():
+    global _profiler
+
+    _profiler = None
+    os.environ.pop(PROFILE_ENV, None)
+    os.environ.pop(PROFILE_EVERY_ENV, None)
+
+
+def is_enabled() -> bool:
+    return _profiler is not None
+
+
+def enable_from_env():
+    directory = os.environ.get(PROFILE_ENV)
+    if not directory:
+        return
+
+    try:
+        every = int(os.environ.get(PROFILE_EVERY_ENV) or 1)
+    except ValueError:
+        logger.warning(f"Invalid {PROFILE_EVERY_ENV}, profiling every operation.")
+        every = 1
+
+    enable(directory, every)
+
+
+def profiled(operation: str):
+    # a no-op unless profiling is enabled, then the profiler decides per call
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            return profiler.run(operation, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add_profile_arguments(parser):
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        default=None,
+        help="write cProfile and tracemalloc reports per operation to DIR",
+    )
+    parser.add_argument(
+        "--profile-every",
+        metavar="N",
+        type=int,
+        default=1,
+        help="profile only every Nth operation of each kind",
+    )
+
+
+def configure_profiling(args):
+    if args.profile:
+        enable(args.profile, args.profile_every)
+
+
+enable_from_env()
@@ -0,0 +1,145 @@
+import argparse
+import logging
+import mimetypes
+from pathlib import Path
+from typing import NamedTuple
+
+import src.utilities as utilities
+from src.ciphers import DEFAULT_SUITE, SUITES
+from src.decryptor import Decryptor
+from src.encryptor import Encryptor
+from src.envelope import Envelope
+from src.profiling import add_profile_arguments, configure_profiling
+
+logger = logging.getLogger(__name__)
+
+
+class RecipientBundle(NamedTuple):
+    token_path: Path
+    wrapped_key_paths: dict[str, Path]
+
+
+def _load_image(validator: utilities.Validator, path, image_type: str) -> str:
+    is_valid, byte_string = validator.validate_upload(path, image_type)
+    if not is_valid:
+        raise ValueError(f"Invalid {image_type} image: {path}")
+    return byte_string
+
+
+def _check_name(name: str) -> str:
+    # the name becomes part of a file name in the output folder
+    if not name or any(sep in name for sep in "/\\"):
+        raise ValueError(f"Invalid recipient name: {name!r}")
+    return name
+
+
+def save_for_recipients(
+    data: bytes,
+    recipient_key_images: dict[str, str | Path],
+    output_dir: str | Path,
+    file_name: str = "",
+    mime_type: str = "",
+    suite: str = DEFAULT_SUITE,
+) -> RecipientBundle:
+    # the token image is built and written once, each recipient only gets
+    # a small WRAPPED_KEY image sealed with the key from their own KEY image
+    for name in recipient_key_images:
+        _check_name(name)
+
+    validator = utilities.Validator()
+    recipient_keys = {
+        name: _load_image(validator, path, "KEY")
+        for name, path in recipient_key_images.items()
+    }
+
+    token, wrapped_keys = Encryptor().encrypt_for_recipients(
+        data, recipient_keys, file_name, mime_type, suite=suite
+    )
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    padding = utilities.BufferedRandomPadding()
+
+    token_image = utilities.ArrayUtil(token, padding).transform_array_image()
+    token_path = output_dir / utilities.TOKEN_IMAGE_NAME
+    utilities.write_image(token_image, "CIPHER", token_path)
+
+    wrapped_key_paths = {}
+    for name, wrapped_key in wrapped_keys.items():
+        wrapped_image = utilities.ArrayUtil(
+            wrapped_key, padding
+        ).transform_array_image()
+        wrapped_path = output_dir / f"cipher-wrapped_key-{name}.png"
+        utilities.write_image(wrapped_image, "WRAPPED_KEY", wrapped_path)
+        wrapped_key_paths[name] = wrapped_path
+
+    logger.info("Token saved once for %d recipients.", len(wrapped_key_paths))
+    return RecipientBundle(token_path, wrapped_key_paths)
+
+
+def decrypt_for_recipient(
+    key_image: str | Path,
+    wrapped_key_image: str | Path,
+    token_image: str | Path,
+) -> Envelope:
+    validator = utilities.Validator()
+    key = _load_image(validator, key_image, "KEY")
+    wrapped_key = _load_image(validator, wrapped_key_image, "WRAPPED_KEY")
+    token = _load_image(validator, token_image, "CIPHER")
+
+    return Decryptor().decrypt_wrapped(key, wrapped_key, token)
+
+
+def _recipient(value: str) -> tuple[str, str]:
+    name, separator, path = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError("expected NAME=KEY_IMAGE")
+    try:
+        return _check_name(name), path
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Encrypt once for many recipients, or decrypt as one of them."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    encrypt = commands.add_parser("encrypt")
+    encrypt.add_argument("input_file")
+    encrypt.add_argument("--recipient", type=_recipient, action="append", required=True)
+    encrypt.add_argument("--output", required=True)
+    encrypt.add_argument("--suite", choices=list(SUITES), default=DEFAULT_SUITE)
+
+    decrypt = commands.add_parser("decrypt")
+    decrypt.add_argument("--key", required=True)
+    decrypt.add_argument("--wrapped-key", required=True)
+    decrypt.add_argument("--token", required=True)
+    decrypt.add_argument("--output", required=True)
+
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    if args.command == "encrypt":
+        input_path = Path(args.input_file)
+        bundle = save_for_recipients(
+            utilities.read_file(input_path),
+            dict(args.recipient),
+            args.output,
+            file_name=input_path.name,
+            mime_type=mimetypes.guess_type(input_path.name)[0] or "",
+            suite=args.suite,
+        )
+        print(f"token: {bundle.token_path}")
+        for name, path in bundle.wrapped_key_paths.items():
+            print(f"{name}: {path}")
+    else:
+        envelope = decrypt_for_recipient(args.key, args.wrapped_key, args.token)
+        utilities.ResultSaver(args.output).save_result(envelope.iter_chunks())
+        print(f"decrypted: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import io
+import json
+import logging
+import os
+import socketserver
+from base64 import b64decode, b64encode
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from zipfile import ZipFile
+
+import src.utilities as utilities
+from src.ciphers import DEFAULT_SUITE
+from src.decryptor import Decryptor
+from src.encryptor import Encryptor
+from src.profiling import add_profile_arguments, configure_profiling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# request bodies above this are refused before they are read
+MAX_BODY_SIZE = 64 * 1024 * 1024
+OUTPUT_FORMATS = ("zip", "json")
+
+# per worker process, filled once by _init_worker and reused by every request
+_worker_cache = {}
+
+
+def _init_worker():
+    _worker_cache["encryptor"] = Encryptor()
+    _worker_cache["decryptor"] = Decryptor()
+    _worker_cache["engine"] = utilities.PixelEngine(utilities.BufferedRandomPadding())
+    _worker_cache["validator"] = utilities.Validator(engine=_worker_cache["engine"])
+    logger.info("Service worker %d ready.", os.getpid())
+
+
+def _png_bytes(image, image_type: str, rescale: bool):
+    buffer = io.BytesIO()
+    utilities.write_image(image, image_type, buffer, rescale=rescale)
+    return buffer.getvalue()
+
+
+def _encrypt_request(
+    data: bytes, file_name: str, mime_type: str, output_format: str, suite: str
+) -> tuple[str, bytes]:
+    key, token = _worker_cache["encryptor"].encrypt_bytes(
+        data, file_name, mime_type, suite=suite
+    )
+
+    # pooled images, written out before this worker takes the next request
+    key_image, token_image = _worker_cache["engine"].encode_many([key, token])
+    if output_format == "zip":
+        buffer = io.BytesIO()
+        utilities.CipherSaver(data, key, token, key_image, token_image).save_cipher(
+            buffer
+        )
+        return "application/zip", buffer.getvalue()
+
+    body = {
+        "key": key.decode(),
+        "token": token.decode(),
+        "key_image": b64encode(_png_bytes(key_image, "KEY", False)).decode(),
+        "token_image": b64encode(_png_bytes(token_image, "CIPHER", False)).decode(),
+    }
+    return "application/json", json.dumps(body).encode()
+
+
+def _read_bundle(data: bytes) -> tuple[bytes, bytes]:
+    # default images of a saved zip bundle
+    with ZipFile(io.BytesIO(data)) as bundle:
+        return (
+            bundle.read(utilities.KEY_IMAGE_NAME),
+            bundle.read(utilities.TOKEN_IMAGE_NAME),
+        )
+
+
+def _decrypt_request(data: bytes, content_type: str) -> tuple[str, str, bytes]:
+    if content_type == "application/zip":
+        key_png, token_png = _read_bundle(data)
+    else:
+        body = json.loads(data)
+        key_png = b64decode(body["key_image"])
+        token_png = b64decode(body["token_image"])
+
+    validator = _worker_cache["validator"]
+    key_valid, key = validator.validate_upload(io.BytesIO(key_png), "KEY")
+    token_valid, token = validator.validate_upload(io.BytesIO(token_png), "CIPHER")
+
+    if not (key_valid and token_valid):
+        raise ValueError("Invalid KEY or CIPHER image.")
+
+    envelope = _worker_cache["decryptor"].decrypt_envelope(key, token)
+    if envelope.mime_type:
+        mime_type = envelope.mime_type
+    elif envelope.as_text() is None:
+        mime_type = "application/octet-stream"
+    else:
+        mime_type = "text/plain; charset=utf-8"
+
+    return mime_type, envelope.file_name, envelope.payload
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    # keep-alive, so clients can reuse one connection for many requests
+    protocol_version = "HTTP/1.1"
+    server_version = "SifrPN"
+
+    def _send(self, status: int, content_type: str, body: bytes, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str):
+        body = json.dumps({"error": message}).encode()
+        self._send(status, "application/json", body)
+
+    def _read_body(self) -> bytes | None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+
+        if length < 0:
+            self._send_error(400, "Invalid Content-Length.")
+            self.close_connection = True
+            return None
+        if length > MAX_BODY_SIZE:
+            self._send_error(413, "Request body too large.")
+            self.close_connection = True
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send(200, "application/json", b'{"status": "ok"}')
+        else:
+            self._send_error(404, "Not found.")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        body = self._read_body()
+        if body is None:
+            return
+
+        try:
+            match url.path:
+                case "/encrypt":
+                    output_format = query.get("format", ["zip"])[0]
+                    if output_format not in OUTPUT_FORMATS:
+                        raise ValueError(f"Unknown format: {output_format}")
+
+                    content_type, result = self.server.executor.submit(
+                        _encrypt_request,
+                        body,
+                        query.get("file_name", [""])[0],
+                        query.get("mime_type", [""])[0],
+                        output_format,
+                        query.get("suite", [DEFAULT_SUITE])[0],
+                    ).result()
+                    self._send(200, content_type, result)
+                case "/decrypt":
+                    request_type = self.headers.get("Content-Type", "").split(";")[0]
+                    content_type, file_name, result = self.server.executor.submit(
+                        _decrypt_request, body, request_type
+                    ).result()
+                    headers = {"X-SifrPN-File-Name": file_name} if file_name else {}
+                    self._send(200, content_type, result, headers)
+                case _:
+                    self._send_error(404, "Not found.")
+        except Exception as e:
+            logger.exception(f"Service Error: {e}")
+            self._send_error(400, str(e) or type(e).__name__)
+
+    def address_string(self):
+        # unix socket peers have no host
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def create_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    unix_socket: str | None = None,
+    workers: int = utilities.MAX_WORKERS,
+):
+    # warm workers are shared by every request for the server's lifetime
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    for future in [executor.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = UnixHTTPServer(unix_socket, ServiceHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+
+    server.executor = executor
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SifrPN local HTTP service.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--workers", type=int, default=utilities.MAX_WORKERS)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    server = create_server(args.host, args.port, args.unix_socket, args.workers)
+    address = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"SifrPN service listening on {address}")
+    logger.info("Service started on %s.", address)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.executor.shutdown()
+        logger.info("Service stopped.")
+
+
+if __name__ == "__main__":
+    main()
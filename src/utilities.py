@@ -1,16 +1,27 @@
+import hashlib
+import io
 import json
 import logging.config
 import os
 import re
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
 from math import ceil, pow, sqrt
 from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
 from zipfile import ZipFile
 
 import numpy as np
 import yaml
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
 from PIL import Image
 from PIL.PngImagePlugin import PngInfo
 
@@ -23,10 +34,202 @@ with open(config_path, "r") as yf:
 
 logger = logging.getLogger(__name__)
 
+# imported after the logging config, which disables loggers created before it
+from src.profiling import profiled  # noqa: E402
+
+# thread pool size for image building and png encoding
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+# pillow modes by channel count: grayscale, rgb and rgba
+CHANNEL_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+# longest side over shortest side allowed for compact layouts
+MAX_ASPECT_RATIO = 2
+
+# saved images with a longest side below a threshold are block scaled up to it
+RESCALE_THRESHOLDS = (500, 1000, 1500, 2000)
+
+# png compression strategy for pixel noise
+NOISE_SAMPLE_BYTES = 65536
+NOISE_ENTROPY_RATIO = 0.9
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+BASE64_PATTERN = re.compile(r"[A-Za-z0-9_-]+={0,2}")
+
+# 2: compact metadata json, 1: full debug json in every bundle
+BUNDLE_FORMAT_VERSION = 2
+# characters escaped per write when streaming the debug session
+SESSION_CHUNK_SIZE = 65536
+# default images of a saved bundle, as named by CipherSaver._save_image
+KEY_IMAGE_NAME = "cipher-key_image-default.png"
+TOKEN_IMAGE_NAME = "cipher-token_image-default.png"
+# bytes per write when saving decrypted results
+RESULT_CHUNK_SIZE = 1024 * 1024
+# random temp names tried before a result save gives up
+PART_NAME_ATTEMPTS = 100
+
+# stages reported to progress callbacks, in pipeline order
+PROGRESS_STAGES = ("read", "encrypt", "pixel", "png", "zip", "decode", "decrypt")
+# minimum seconds between two reports of the same stage
+PROGRESS_INTERVAL = 0.1
+
+
+def rescale_factor(longest_side: int) -> int:
+    # k for the saved rescaled copy, the smallest k that reaches the next
+    # threshold, 1 once the image is already large
+    resize_width = next(
+        (width for width in RESCALE_THRESHOLDS if longest_side < width),
+        None,
+    )
+
+    if resize_width is None:
+        return 1
+
+    return max(1, ceil(resize_width / longest_side))
+
+
+class ProgressReporter:
+    # throttled callback(stage, done, total), counted in bytes,
+    # stage changes and completed stages are always passed through
+    def __init__(self, callback=None, interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self._stage = None
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, done: int, total: int) -> None:
+        if self.callback is None:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if (
+                stage == self._stage
+                and done < total
+                and now - self._last_report < self.interval
+            ):
+                return
+            self._stage, self._last_report = stage, now
+
+        self.callback(stage, done, total)
+
+
+def as_reporter(progress) -> ProgressReporter:
+    # accepts None, a plain callback or an existing reporter
+    if isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
+
+
+def read_file(file_path, progress=None, chunk_size: int = RESULT_CHUNK_SIZE) -> bytes:
+    reporter = as_reporter(progress)
+    total = os.path.getsize(file_path)
+    chunks = []
+    done = 0
+
+    reporter("read", 0, total)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            chunks.append(chunk)
+            done += len(chunk)
+            reporter("read", done, total)
+
+    return b"".join(chunks)
+
+
+class PaddingSource(ABC):
+    # supplies the random bytes used to fill an image up to its full shape
+    @abstractmethod
+    def get_bytes(self, count: int) -> bytes: ...
+
+
+class OSRandomPadding(PaddingSource):
+    def get_bytes(self, count: int) -> bytes:
+        return os.urandom(count)
+
+
+class BufferedRandomPadding(PaddingSource):
+    # chacha20 keystream seeded from os.urandom, refilled in bulk
+    def __init__(self, pool_size: int = 65536):
+        self.pool_size = pool_size
+        self._pool = b""
+        self._offset = 0
+        self._stream = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _reseed(self):
+        cipher = Cipher(
+            algorithms.ChaCha20(os.urandom(32), os.urandom(16)),
+            mode=None,
+        )
+        self._stream = cipher.encryptor()
+        self._pid = os.getpid()
+
+    def _refill(self):
+        # a forked worker must not replay the parent's keystream
+        if self._pid != os.getpid():
+            self._reseed()
+
+        self._pool = self._stream.update(bytes(self.pool_size))
+        self._offset = 0
+
+    def get_bytes(self, count: int) -> bytes:
+        if count > self.pool_size:
+            return os.urandom(count)
+
+        with self._lock:
+            if self._pid != os.getpid() or len(self._pool) - self._offset < count:
+                self._refill()
+
+            chunk = self._pool[self._offset : self._offset + count]
+            self._offset += count
+
+        return chunk
+
+
+class SeededPadding(PaddingSource):
+    # deterministic, for tests and benchmarks only
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+
+    def get_bytes(self, count: int) -> bytes:
+        return self._rng.bytes(count)
+
+
+def true_shape(text: dict) -> tuple[int, int]:
+    # (height, width) before rescaling, older images are always square
+    true_size = int(text["SifrPNTrueSize"])
+    true_width = int(text.get("SifrPNTrueWidth", true_size))
+    true_height = int(text.get("SifrPNTrueHeight", true_size))
+
+    return true_height, true_width
+
 
 class ArrayUtil:
-    def __init__(self, data):
+    def __init__(
+        self,
+        data,
+        padding_source: PaddingSource | None = None,
+        layout: str = "square",
+        width: int | None = None,
+        channels: int = 3,
+        progress=None,
+    ):
+        # layout "square" keeps the original side x side images,
+        # "compact" picks width x height for the least padding
+        if layout not in ("square", "compact"):
+            raise ValueError(f"Unknown layout: {layout}")
+        if channels not in CHANNEL_MODES:
+            raise ValueError(f"Unsupported channel count: {channels}")
+
         self.data = data
+        self.padding_source = padding_source or OSRandomPadding()
+        self.layout = layout
+        self.width = width
+        self.channels = channels
+        self.progress = as_reporter(progress)
 
     def _calc_array_shape(self, list_len: int) -> tuple[int, int]:
         side = sqrt(list_len / 3)
@@ -40,44 +243,114 @@ class ArrayUtil:
         else:
             return int(side), 0
 
-    def _prepare_array(self) -> tuple[list[int], int, int]:
+    def _calc_compact_shape(self, list_len: int) -> tuple[int, int]:
+        pixels = ceil(list_len / self.channels)
+
+        if self.width:
+            return self.width, ceil(pixels / self.width)
+
+        # from square towards MAX_ASPECT_RATIO, keep the width with least waste
+        best_width = ceil(sqrt(pixels))
+        best_waste = best_width * ceil(pixels / best_width) - pixels
+        min_width = max(1, ceil(sqrt(pixels / MAX_ASPECT_RATIO)))
+
+        for width in range(best_width - 1, min_width - 1, -1):
+            if best_waste == 0:
+                break
+            waste = width * ceil(pixels / width) - pixels
+            if waste < best_waste:
+                best_width, best_waste = width, waste
+
+        return best_width, ceil(pixels / best_width)
+
+    def _calc_layout(self, list_len: int) -> tuple[int, int, int]:
+        # width, height and padding bytes for list_len payload bytes
+        if self.layout == "square" and self.channels == 3 and not self.width:
+            side, pad = self._calc_array_shape(list_len)
+            return side, side, pad
+
+        if self.layout == "square" and not self.width:
+            side = ceil(sqrt(ceil(list_len / self.channels)))
+            width, height = side, side
+        else:
+            width, height = self._calc_compact_shape(list_len)
+
+        return width, height, width * height * self.channels - list_len
+
+    def _prepare_array(self) -> tuple[np.ndarray, tuple[int, int], int]:
         raw_bytes = urlsafe_b64decode(self.data)
-        int_list = [_ for _ in raw_bytes]
-        side, pad = self._calc_array_shape(len(int_list))
+        width, height, pad = self._calc_layout(len(raw_bytes))
 
         if pad != 0:
-            random_pad = os.urandom(pad)
-            pad_list = [_ for _ in random_pad]
-            int_list.extend(pad_list)
+            raw_bytes += self.padding_source.get_bytes(pad)
 
-            return int_list, side, pad
-        else:
-            return int_list, side, 0
+        return np.frombuffer(raw_bytes, dtype=np.uint8), (width, height), pad
 
     def transform_array_image(self) -> tuple[Image.Image, int]:
-        int_list: list[int]
-        side: int
+        int_array: np.ndarray
+        size: tuple[int, int]
         pad: int
 
-        int_list, side, pad = self._prepare_array()
+        total = len(self.data)
+        self.progress("pixel", 0, total)
+
+        int_array, size, pad = self._prepare_array()
 
-        image_array = np.asarray(int_list, dtype=np.uint8).reshape(side, side, 3)
+        width, height = size
+        if self.channels == 1:
+            image_array = int_array.reshape(height, width)
+        else:
+            image_array = int_array.reshape(height, width, self.channels)
 
         image = Image.fromarray(image_array)
+        self.progress("pixel", total, total)
 
         return image, pad
 
 
 class ImageUtil:
-    def __init__(self, data: Image.Image):
+    def __init__(self, data: Image.Image, verify_scale: bool = False, progress=None):
         # data is loaded with
         # ("PaddingCountHint", str(pad))
-        # ("ResizeScaleFactor", str(true_size))
+        # ("SifrPNTrueSize", str(true_size))
+        # ("SifrPNScaleFactor", str(scale_factor))
+        # ("SifrPNTrueWidth", str(width)), ("SifrPNTrueHeight", str(height))
         self.data = data
+        self.verify_scale = verify_scale
+        self.progress = as_reporter(progress)
+
+    def _is_exact_scale(self, image_array, true_array, scale_factor: int) -> bool:
+        expanded = true_array.repeat(scale_factor, axis=0).repeat(scale_factor, axis=1)
+        return np.array_equal(image_array, expanded)
+
+    def _true_shape(self) -> tuple[int, int]:
+        return true_shape(self.data.text)
 
     def _prepare_image(self):
         if "IsSifrPNRescaled" in self.data.text:
             true_size = int(self.data.text["SifrPNTrueSize"])
+            true_shape = self._true_shape()
+
+            if "SifrPNScaleFactor" in self.data.text:
+                # every true pixel is an exact k x k block,
+                # so a strided view restores the true image
+                scale_factor = int(self.data.text["SifrPNScaleFactor"])
+                image_array = np.asarray(self.data)
+                true_array = image_array[::scale_factor, ::scale_factor]
+
+                if true_array.shape[:2] != true_shape:
+                    raise ValueError(
+                        f"Scale factor {scale_factor} does not match true shape {true_shape}."
+                    )
+
+                if self.verify_scale and not self._is_exact_scale(
+                    image_array, true_array, scale_factor
+                ):
+                    raise ValueError("Rescaled image is not an exact block scale.")
+
+                return true_array
+
+            # images rescaled before integer block scaling
             default_image = self.data.resize(
                 (true_size, true_size),
                 resample=Image.NEAREST,
@@ -91,7 +364,7 @@ class ImageUtil:
         # return true int list
         pch = int(self.data.text["PaddingCountHint"])
         one_d_array = np.ravel(image_array)
-        int_list = one_d_array[:-pch]
+        int_list = one_d_array[: one_d_array.size - pch]
         return int_list
 
     def _prep_int_list(self, int_list):
@@ -103,6 +376,9 @@ class ImageUtil:
         return urlsafe_b64encode(raw_bytes)
 
     def transform_image_array(self):
+        total = self.data.width * self.data.height * len(self.data.getbands())
+        self.progress("decode", 0, total)
+
         # check first if image is scaled
         # array
         img_arr = self._prepare_image()
@@ -112,52 +388,287 @@ class ImageUtil:
         raw_bytes = self._prep_int_list(int_list)
 
         b64_urlsafe = self._encode_raw_bytes(raw_bytes)
+        self.progress("decode", total, total)
+
+        return b64_urlsafe
+
+
+class PixelEngine:
+    # long-lived ArrayUtil/ImageUtil for batch work, the scratch buffer and
+    # pillow images are kept per thread and reused from call to call
+    def __init__(
+        self,
+        padding_source: PaddingSource | None = None,
+        layout: str = "square",
+        width: int | None = None,
+        channels: int = 3,
+    ):
+        self.padding_source = padding_source or OSRandomPadding()
+        # shape rules only, the data comes with each call
+        self._layout = ArrayUtil(b"", self.padding_source, layout, width, channels)
+        self.mode = CHANNEL_MODES[channels]
+        self._local = threading.local()
+
+    def _state(self) -> threading.local:
+        state = self._local
+        if not hasattr(state, "buffer"):
+            state.buffer = np.empty(0, dtype=np.uint8)
+            state.images = []
+        return state
+
+    def _scratch(self, size: int) -> np.ndarray:
+        # grows to the largest payload seen, never shrinks
+        state = self._state()
+        if state.buffer.size < size:
+            state.buffer = np.empty(size, dtype=np.uint8)
+        return state.buffer[:size]
+
+    def _image(self, slot: int, size: tuple[int, int]) -> Image.Image:
+        # one pooled image per slot, replaced only when its size changes
+        images = self._state().images
+        if slot == len(images):
+            images.append(None)
+
+        image = images[slot]
+        if image is None or image.size != size:
+            image = Image.new(self.mode, size)
+            images[slot] = image
+        return image
+
+    def _encode(self, data, slot: int, progress=None) -> tuple[Image.Image, int]:
+        reporter = as_reporter(progress)
+        total = len(data)
+        reporter("pixel", 0, total)
+
+        raw_bytes = urlsafe_b64decode(data)
+        width, height, pad = self._layout._calc_layout(len(raw_bytes))
+
+        # payload and padding meet in the scratch buffer, not in a new bytes
+        scratch = self._scratch(len(raw_bytes) + pad)
+        scratch[: len(raw_bytes)] = np.frombuffer(raw_bytes, dtype=np.uint8)
+        if pad != 0:
+            padding = self.padding_source.get_bytes(pad)
+            scratch[len(raw_bytes) :] = np.frombuffer(padding, dtype=np.uint8)
+
+        image = self._image(slot, (width, height))
+        image.frombytes(scratch)
+        reporter("pixel", total, total)
+
+        return image, pad
+
+    def encode(self, data, progress=None) -> tuple[Image.Image, int]:
+        # the image is pooled, save it before the next encode on this thread
+        return self._encode(data, 0, progress)
+
+    def encode_many(self, datas: Iterable) -> list[tuple[Image.Image, int]]:
+        # every image gets its own slot, all valid until the next encode
+        return [self._encode(data, slot) for slot, data in enumerate(datas)]
+
+    def decode(self, image: Image.Image, progress=None) -> bytes:
+        reporter = as_reporter(progress)
+        channels = len(image.getbands())
+        total = image.width * image.height * channels
+        reporter("decode", 0, total)
+
+        pch = int(image.text["PaddingCountHint"])
+
+        if "IsSifrPNRescaled" not in image.text:
+            pixels = memoryview(image.tobytes())
+        elif "SifrPNScaleFactor" in image.text:
+            # every true pixel is an exact k x k block, the strided view
+            # is packed into the scratch buffer
+            scale_factor = int(image.text["SifrPNScaleFactor"])
+            image_array = np.frombuffer(image.tobytes(), dtype=np.uint8)
+            image_array = image_array.reshape(image.height, image.width, channels)
+            true_array = image_array[::scale_factor, ::scale_factor]
+
+            shape = true_shape(image.text)
+            if true_array.shape[:2] != shape:
+                raise ValueError(
+                    f"Scale factor {scale_factor} does not match true shape {shape}."
+                )
+
+            scratch = self._scratch(true_array.size)
+            np.copyto(scratch.reshape(true_array.shape), true_array)
+            pixels = memoryview(scratch)
+        else:
+            # images rescaled before integer block scaling
+            true_size = int(image.text["SifrPNTrueSize"])
+            true_image = image.resize((true_size, true_size), resample=Image.NEAREST)
+            pixels = memoryview(true_image.tobytes())
+
+        b64_urlsafe = urlsafe_b64encode(pixels[: len(pixels) - pch])
+        reporter("decode", total, total)
 
         return b64_urlsafe
 
+    def decode_many(self, images: Iterable[Image.Image]) -> list[bytes]:
+        return [self.decode(image) for image in images]
+
+
+def is_noise_image(image: Image.Image) -> bool:
+    # byte entropy of the first rows, close to the maximum means random data
+    # capped to the image, crop pads rows below it with zeros
+    sample_rows = min(
+        image.height,
+        max(1, NOISE_SAMPLE_BYTES // (image.width * len(image.getbands()))),
+    )
+    sample = np.asarray(image.crop((0, 0, image.width, sample_rows))).ravel()
+
+    counts = np.bincount(sample, minlength=256)
+    probabilities = counts[counts > 0] / sample.size
+    entropy = -np.sum(probabilities * np.log2(probabilities))
+    max_entropy = np.log2(min(sample.size, 256))
+
+    return entropy >= NOISE_ENTROPY_RATIO * max_entropy
+
+
+def png_compress_level(is_noise: bool, scale_factor: int) -> int:
+    if not is_noise:
+        return 6
+
+    # noise does not deflate, only the k x k blocks of a rescale do
+    return 1 if scale_factor > 1 else 0
+
+
+def block_rescale(image: Image.Image) -> tuple[Image.Image, int, int]:
+    true_size = image.width
+    scale_factor = rescale_factor(max(image.size))
+
+    if scale_factor == 1 and max(image.size) >= RESCALE_THRESHOLDS[-1]:
+        return image, true_size, 1
+
+    # integer block scaling: each pixel becomes an exact k x k block
+    resized_image = image.resize(
+        (image.width * scale_factor, image.height * scale_factor),
+        resample=Image.NEAREST,
+    )
+
+    return resized_image, true_size, scale_factor
+
+
+def write_image(
+    image: tuple[Image.Image, int],
+    image_type: str,
+    file,
+    rescale: bool = False,
+    compress_level: int | None = None,
+) -> None:
+    # file is a path or a binary file object, e.g. io.BytesIO,
+    # compress_level None picks a zlib level from the image content
+    instance_image, pad = image
+
+    metadata = PngInfo()
+    metadata.add_text("IsSifrPixelNoise", str(True))
+    metadata.add_text("SifrPNImageType", str(image_type))
+    metadata.add_text("PaddingCountHint", str(pad))
+    metadata.add_text("SifrPNTrueWidth", str(instance_image.width))
+    metadata.add_text("SifrPNTrueHeight", str(instance_image.height))
+    metadata.add_text("SifrPNChannels", str(len(instance_image.getbands())))
+
+    scale_factor = 1
+    if rescale:
+        instance_image, true_size, scale_factor = block_rescale(instance_image)
+        metadata.add_text("SifrPNTrueSize", str(true_size))
+        metadata.add_text("SifrPNScaleFactor", str(scale_factor))
+        metadata.add_text("IsSifrPNRescaled", str(True))
+
+    if compress_level is None:
+        # sampled before the rescale, blocks would skew the entropy
+        is_noise = is_noise_image(image[0])
+        compress_level = png_compress_level(is_noise, scale_factor)
+
+    instance_image.save(
+        file,
+        format="PNG",
+        pnginfo=metadata,
+        compress_level=compress_level,
+    )
+
 
 class CipherSaver:
     def __init__(
         self,
-        input_string: str,
+        input_string: str | bytes,
         key: bytes,
         token: bytes,
         key_image: Image.Image,
         token_image: Image.Image,
+        max_workers: int = MAX_WORKERS,
+        compress_level: int | None = None,
+        catalog=None,
+        debug_session: bool = False,
+        progress=None,
     ):
-        self.session = {}
+        self.work_path = None
+        self.max_workers = max_workers
+        # None picks a zlib level per image, see png_compress_level
+        self.compress_level = compress_level
+        # optional catalog.CipherCatalog, records every saved bundle
+        self.catalog = catalog
+        # True also archives the input, key and token for debugging
+        self.debug_session = debug_session
+        self.progress = as_reporter(progress)
         self.input_string = input_string
         self.key = key
         self.token = token
         self.key_image = key_image
         self.token_image = token_image
 
-    def _save_session(self):
-        self.session["date"] = datetime.now().isoformat()
-        self.session["input"] = self.input_string
-        self.session["key"] = self.key.decode()
-        self.session["token"] = self.token.decode()
-
-        return self.session
-
-    def _resize_image(self, image):
-        true_size = image.width
-        thresholds = [500, 1000, 1500, 2000]
-
-        resize_width = next(
-            (width for width in thresholds if image.width < width),
-            None,
-        )
-
-        if resize_width is None:
-            return image, true_size
-
-        resized_image = image.resize(
-            (resize_width, resize_width),
-            resample=Image.NEAREST,
-        )
-
-        return resized_image, true_size
+    def _session_metadata(self) -> dict:
+        # compact default record: sizes and hashes, never the payload itself
+        input_data = self.input_string
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
+
+        return {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "date": datetime.now().isoformat(),
+            "input_size": len(input_data),
+            "input_type": "bytes" if isinstance(self.input_string, bytes) else "text",
+            "token_size": len(self.token),
+            "token_sha256": hashlib.sha256(self.token).hexdigest(),
+            "key_image_size": list(self.key_image[0].size),
+            "token_image_size": list(self.token_image[0].size),
+        }
+
+    def _write_json_string(self, file, value: str | bytes) -> None:
+        # escaped chunk by chunk, so the payload is never copied whole
+        file.write('"')
+        if isinstance(value, bytes):
+            # multiples of 3 bytes keep base64 padding out of the middle
+            for start in range(0, len(value), SESSION_CHUNK_SIZE * 3):
+                chunk = value[start : start + SESSION_CHUNK_SIZE * 3]
+                file.write(urlsafe_b64encode(chunk).decode())
+        else:
+            for start in range(0, len(value), SESSION_CHUNK_SIZE):
+                chunk = value[start : start + SESSION_CHUNK_SIZE]
+                file.write(json.dumps(chunk)[1:-1])
+        file.write('"')
+
+    def _write_session(self, zip: ZipFile) -> None:
+        metadata = self._session_metadata()
+
+        if not self.debug_session:
+            zip.writestr("cipher-json_info-metadata.json", json.dumps(metadata))
+            return
+
+        # full debug record, streamed straight into the archive
+        arcname = "cipher-json_info-for_debugging.json"
+        with zip.open(arcname, "w") as raw_file, io.TextIOWrapper(
+            raw_file, encoding="utf-8"
+        ) as file:
+            file.write(json.dumps(metadata)[:-1])
+            file.write(', "input": ')
+            self._write_json_string(file, self.input_string)
+            if isinstance(self.input_string, bytes):
+                # uploaded files are kept as raw bytes
+                file.write(', "input_encoding": "base64"')
+            file.write(', "key": ')
+            self._write_json_string(file, self.key.decode())
+            file.write(', "token": ')
+            self._write_json_string(file, self.token.decode())
+            file.write("}")
 
     def _create_path(self) -> Path:
         directory_path = Path.home() / "Documents" / "ciphers"
@@ -165,19 +676,30 @@ class CipherSaver:
 
         return directory_path
 
+    def _create_work_path(self) -> Path:
+        # one scratch folder per save, so concurrent saves never share files
+        return Path(tempfile.mkdtemp(prefix=".cipher-", dir=self._create_path()))
+
     def _clean_residuals(
         self,
-        text_path: Path,
         key_path: Path,
         token_path: Path,
         resized_key_path: Path,
         resized_token_path: Path,
     ) -> None:
-        text_path.unlink(missing_ok=True)
-        key_path.unlink(missing_ok=True)
-        token_path.unlink(missing_ok=True)
-        resized_key_path.unlink(missing_ok=True)
-        resized_token_path.unlink(missing_ok=True)
+        # failed saves come back as None
+        for path in (
+            key_path,
+            token_path,
+            resized_key_path,
+            resized_token_path,
+        ):
+            if path is not None:
+                path.unlink(missing_ok=True)
+
+        if self.work_path is not None:
+            shutil.rmtree(self.work_path, ignore_errors=True)
+            self.work_path = None
 
     def _prepare_files(save_function):
         @wraps(save_function)
@@ -196,78 +718,127 @@ class CipherSaver:
 
         return wrapper_function
 
-    @_prepare_files
-    def _save_json(self, session: list, cipher_name: str) -> Path:
-        path = self._create_path()
-        file_name = path / f"cipher-{cipher_name}-for_debugging.json"
-
-        with file_name.open("w+", encoding="utf-8") as file:
-            json.dump(session, file)
-
-        return file_name
-
     @_prepare_files
     def _save_image(
         self,
         image: tuple[Image.Image, int],
         cipher_name: str,
         image_type: str,
-    ) -> tuple[Path, Path]:
-        # arr_util = ArrayUtil(cipher)
-        # image, pad = arr_util.transform_array_image()
+        rescale: bool = False,
+    ) -> Path:
+        path = self.work_path or self._create_path()
+        variant = "resized" if rescale else "default"
 
-        instance_image, pad = image
+        file_name = path / f"cipher-{cipher_name}-{variant}.png"
+        write_image(image, image_type, file_name, rescale, self.compress_level)
 
-        metadata = PngInfo()
-        metadata.add_text("IsSifrPixelNoise", str(True))
-        metadata.add_text("SifrPNImageType", str(image_type))
-        metadata.add_text("PaddingCountHint", str(pad))
+        return file_name
 
-        path = self._create_path()
+    def _record_bundle(self, bundle_path) -> None:
+        # in-memory bundles have no path to catalog
+        if self.catalog is None or not isinstance(bundle_path, (str, Path)):
+            return
 
-        file_name = path / f"cipher-{cipher_name}-default.png"
-        instance_image.save(file_name, pnginfo=metadata)
+        input_data = self.input_string
+        if isinstance(input_data, str):
+            input_data = input_data.encode()
 
-        resized_image, true_size = self._resize_image(instance_image)
-        metadata.add_text("SifrPNTrueSize", str(true_size))
-        metadata.add_text("IsSifrPNRescaled", str(True))
+        try:
+            self.catalog.record(
+                bundle_path,
+                input_size=len(input_data),
+                token_size=len(self.token),
+                key_dimensions=self.key_image[0].size,
+                token_dimensions=self.token_image[0].size,
+            )
+        except Exception as e:
+            logger.exception(f"Catalog Error: {e}")
 
-        resized_file_name = path / f"cipher-{cipher_name}-resized.png"
-        resized_image.save(resized_file_name, pnginfo=metadata)
+    def _image_bytes(self, image: tuple[Image.Image, int], rescale: bool) -> int:
+        # pixel bytes one png encode goes through, used to weight progress
+        instance_image = image[0]
+        size = instance_image.width * instance_image.height
+        size *= len(instance_image.getbands())
 
-        return file_name, resized_file_name
+        if rescale:
+            size *= rescale_factor(max(instance_image.size)) ** 2
 
+        return size
+
+    @profiled("save")
     def save_cipher(self, custom_file_name_path: str):
-        session_json = self._save_session()
-        json_info = self._save_json(
-            session_json,
-            cipher_name="json_info",
-        )
-        key_image, resized_key_image = self._save_image(
-            self.key_image,
-            cipher_name="key_image",
-            image_type="KEY",
-        )
-        token_image, resized_token_image = self._save_image(
-            self.token_image,
-            cipher_name="token_image",
-            image_type="CIPHER",
-        )
+        self.work_path = self._create_work_path()
+
+        jobs = [
+            (image, cipher_name, image_type, rescale)
+            for rescale in (False, True)
+            for image, cipher_name, image_type in (
+                (self.key_image, "key_image", "KEY"),
+                (self.token_image, "token_image", "CIPHER"),
+            )
+        ]
+        png_total = sum(self._image_bytes(job[0], job[3]) for job in jobs)
+        png_done = 0
+        png_lock = threading.Lock()
+
+        def on_png_done(size: int):
+            nonlocal png_done
+            with png_lock:
+                png_done += size
+                self.progress("png", png_done, png_total)
+
+        self.progress("png", 0, png_total)
+
+        # png encoding releases the gil, so the four image saves run side by side
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            image_futures = []
+            for image, cipher_name, image_type, rescale in jobs:
+                future = executor.submit(
+                    self._save_image,
+                    image,
+                    cipher_name=cipher_name,
+                    image_type=image_type,
+                    rescale=rescale,
+                )
+                size = self._image_bytes(image, rescale)
+                future.add_done_callback(lambda _, size=size: on_png_done(size))
+                image_futures.append(future)
+
+            key_image, token_image, resized_key_image, resized_token_image = [
+                future.result() for future in image_futures
+            ]
 
         try:
+            image_paths = (
+                key_image,
+                token_image,
+                resized_key_image,
+                resized_token_image,
+            )
+            if None in image_paths:
+                raise OSError("Could not write the cipher images.")
+
+            zip_total = sum(path.stat().st_size for path in image_paths)
+            zip_done = 0
+
+            self.progress("zip", 0, zip_total)
             with ZipFile(custom_file_name_path, "w") as zip:
-                zip.write(json_info, arcname=json_info.name)
-                zip.write(key_image, arcname=key_image.name)
-                zip.write(token_image, arcname=token_image.name)
-                zip.write(resized_key_image, arcname=resized_key_image.name)
-                zip.write(resized_token_image, arcname=resized_token_image.name)
+                self._write_session(zip)
+                for image_path in image_paths:
+                    zip.write(image_path, arcname=image_path.name)
+                    zip_done += image_path.stat().st_size
+                    self.progress("zip", zip_done, zip_total)
         except Exception as e:
             logger.exception(f"Error saving files: {e}")
+            # a half written zip must not pass for a bundle
+            if isinstance(custom_file_name_path, (str, Path)):
+                Path(custom_file_name_path).unlink(missing_ok=True)
+            raise
         else:
             logger.info("File saving and zipping successful.")
+            self._record_bundle(custom_file_name_path)
         finally:
             self._clean_residuals(
-                json_info,
                 key_image,
                 token_image,
                 resized_key_image,
@@ -277,37 +848,228 @@ class CipherSaver:
 
 
 class ResultSaver:
-    def __init__(self, file_path):
-        self.file_path = file_path
+    # writes to a temp file next to the target and renames it into place,
+    # so a crash mid-write never leaves a truncated result behind
+    def __init__(self, file_path, fsync: bool = False):
+        self.file_path = Path(file_path)
+        self.fsync = fsync
         self.result_file = None
 
-    def save_result(self, content):
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            file.write(content)
+    def _chunks(self, content) -> Iterator[bytes | memoryview]:
+        if isinstance(content, str):
+            # encoded a slice at a time, never a second full copy
+            for start in range(0, len(content), RESULT_CHUNK_SIZE):
+                yield content[start : start + RESULT_CHUNK_SIZE].encode("utf-8")
+        elif isinstance(content, (bytes, bytearray, memoryview)):
+            view = memoryview(content)
+            for start in range(0, len(view), RESULT_CHUNK_SIZE):
+                yield view[start : start + RESULT_CHUNK_SIZE]
+        else:
+            yield from content
+
+    def _sync_dir(self):
+        # persists the rename itself, not supported on windows
+        if os.name != "posix":
+            return
+
+        dir_fd = os.open(self.file_path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _open_part(self) -> tuple[int, Path]:
+        # unlike mkstemp's 0600, 0o666 lets the os apply the umask itself,
+        # so a new result gets the mode a plain open() would give
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+        for _ in range(PART_NAME_ATTEMPTS):
+            temp_path = self.file_path.with_name(
+                f".{self.file_path.name}.{os.urandom(4).hex()}.part"
+            )
+            try:
+                return os.open(temp_path, flags, 0o666), temp_path
+            except FileExistsError:
+                continue
+
+        raise FileExistsError(f"No free temp name for {self.file_path}")
+
+    @profiled("save")
+    def save_result(self, content: str | bytes | Iterable[bytes]) -> Path:
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = self._open_part()
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                self.result_file = file
+                for chunk in self._chunks(content):
+                    file.write(chunk)
+
+                if self.fsync:
+                    file.flush()
+                    os.fsync(file.fileno())
+
+            try:
+                # a replaced result keeps its mode
+                os.chmod(temp_path, self.file_path.stat().st_mode & 0o7777)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        finally:
+            self.result_file = None
+
+        if self.fsync:
+            self._sync_dir()
+
+        return self.file_path
+
+
+class PngHeader(NamedTuple):
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    text: dict[str, str]
+
+
+class PngSniffer:
+    # reads the signature, IHDR and tEXt chunks only, never the pixel data
+    SIGNATURE = b"\x89PNG\r\n\x1a\n"
+    # text chunks larger than this are skipped, metadata is a few bytes
+    MAX_TEXT_SIZE = 65536
+
+    def _read_chunks(self, file) -> PngHeader | None:
+        if file.read(8) != self.SIGNATURE:
+            return None
+
+        header = None
+        text = {}
+
+        while True:
+            chunk_head = file.read(8)
+            if len(chunk_head) < 8:
+                break
+
+            length, chunk_type = struct.unpack(">I4s", chunk_head)
+
+            if chunk_type == b"IHDR":
+                width, height, bit_depth, color_type = struct.unpack(
+                    ">IIBB", file.read(13)[:10]
+                )
+                header = (width, height, bit_depth, color_type)
+                file.seek(length - 13 + 4, os.SEEK_CUR)
+            elif chunk_type == b"tEXt" and length <= self.MAX_TEXT_SIZE:
+                keyword, _, value = file.read(length).partition(b"\x00")
+                text[keyword.decode("latin-1")] = value.decode("latin-1")
+                file.seek(4, os.SEEK_CUR)
+            elif chunk_type in (b"IDAT", b"IEND"):
+                # pillow writes its text chunks before the image data
+                break
+            else:
+                file.seek(length + 4, os.SEEK_CUR)
+
+        if header is None:
+            return None
+
+        return PngHeader(*header, text)
+
+    def sniff(self, source) -> PngHeader | None:
+        # source is a path or a seekable binary file object
+        try:
+            if hasattr(source, "read"):
+                position = source.tell()
+                try:
+                    return self._read_chunks(source)
+                finally:
+                    source.seek(position)
+
+            with open(source, "rb") as file:
+                return self._read_chunks(file)
+        except (OSError, struct.error) as e:
+            logger.warning(f"PNG sniff failed: {e}")
+            return None
+
+    def scan_folder(
+        self, folder: str | Path, image_type: str | None = None
+    ) -> Iterator[tuple[Path, PngHeader]]:
+        # SifrPN images in folder, optionally of one image type only
+        for path in sorted(Path(folder).glob("*.png")):
+            header = self.sniff(path)
+            if header is None or "IsSifrPixelNoise" not in header.text:
+                continue
+            if image_type and header.text.get("SifrPNImageType") != image_type:
+                continue
+            yield path, header
 
 
 class Validator:
+    def __init__(self, cost_model=None, engine: PixelEngine | None = None):
+        self.sniffer = PngSniffer()
+        # optional admission check, images over its memory budget are refused
+        self.cost_model = cost_model
+        # optional PixelEngine for batch work, else an ImageUtil per image
+        self.engine = engine
+
     def _prep_string(self, string):
-        return "".join([string.strip() for string in string.split()])
+        # pasted tokens rarely contain whitespace, so skip the copy then
+        if WHITESPACE_PATTERN.search(string) is None:
+            return string
+        return WHITESPACE_PATTERN.sub("", string)
+
+    def _is_valid_length(self, string, input_type) -> bool:
+        if input_type == "KEY" and len(string) != 44:
+            return False
+
+        # shortest aead token: header, nonce, empty envelope and tag
+        if input_type in ("CIPHER", "WRAPPED_KEY") and len(string) < 60:
+            return False
+
+        return True
 
     def validate_string(self, string, input_type):
         clean_string = self._prep_string(string)
-        pattern = re.compile(
-            r"^(?:[A-Za-z0-9_-]{4})*(?:[A-Za-z0-9_-]{4}|[A-Za-z0-9_-]{3}=|[A-Za-z0-9_-]{2}={2})$"
-        )
-        if input_type == "KEY" and len(clean_string) != 44:
-            return False, ""
 
-        if input_type == "CIPHER" and len(clean_string) < 100:
+        if not self._is_valid_length(clean_string, input_type):
             return False, ""
 
-        if not re.match(pattern, clean_string):
+        # urlsafe base64: whole 4 char groups, at most two padding chars
+        if len(clean_string) % 4 != 0 or not BASE64_PATTERN.fullmatch(clean_string):
             return False, ""
 
         return True, clean_string
 
-    def validate_upload(self, upload_file_path: str, container_type: str):
+    @profiled("validate")
+    def validate_upload(
+        self, upload_file_path: str, container_type: str, progress=None
+    ):
         try:
+            # reject from the chunk headers before any pixel decode
+            header = self.sniffer.sniff(upload_file_path)
+            if header is None or "IsSifrPixelNoise" not in header.text:
+                logger.warning("Image is not a SifrPixelNoise.")
+                return False, ""
+
+            header_type = header.text.get("SifrPNImageType")
+            if header_type != container_type:
+                logger.warning(
+                    f"Image type mismatch: expected {container_type}, got {header_type}."
+                )
+                return False, ""
+
+            if self.cost_model is not None:
+                channels = int(header.text.get("SifrPNChannels", 3))
+                estimate = self.cost_model.estimate_image(
+                    header.width, header.height, channels
+                )
+                if estimate.route == "refuse":
+                    logger.warning(
+                        f"Image refused: {self.cost_model.describe(estimate)}"
+                    )
+                    return False, ""
+
             with Image.open(upload_file_path, "r") as image:
                 if "IsSifrPixelNoise" in image.text:
                     image_type = image.text["SifrPNImageType"]
@@ -317,15 +1079,17 @@ class Validator:
                         )
                         return False, ""
 
-                    img_util = ImageUtil(image)
-                    byte_string = img_util.transform_image_array()
+                    if self.engine is not None:
+                        byte_string = self.engine.decode(image, progress)
+                    else:
+                        img_util = ImageUtil(image, progress=progress)
+                        byte_string = img_util.transform_image_array()
 
-                    is_valid, clean_string = self.validate_string(
-                        byte_string.decode(),
-                        image_type,
-                    )
+                    # pixels come back through urlsafe_b64encode, so there is
+                    # no whitespace or stray character, only the length can fail
+                    clean_string = byte_string.decode()
 
-                    if not is_valid:
+                    if not self._is_valid_length(clean_string, image_type):
                         logger.warning("String validation failed.")
                         return False, ""
                     return True, clean_string
@@ -0,0 +1,252 @@
+import argparse
+import hashlib
+import json
+import logging
+import mimetypes
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+import src.utilities as utilities
+from src.catalog import CipherCatalog
+from src.ciphers import DEFAULT_SUITE, SUITES
+from src.encryptor import Encryptor
+from src.profiling import add_profile_arguments, configure_profiling
+
+logger = logging.getLogger(__name__)
+
+# seconds between two scans of the input folder
+DEFAULT_INTERVAL = 5.0
+STATE_FILE_NAME = ".sifrpn-watch.json"
+STATE_VERSION = 1
+
+
+class WatchEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: str
+    bundle: str
+
+
+class WatchResult(NamedTuple):
+    path: Path
+    bundle_path: Path | None
+    status: str
+    message: str
+
+
+class FolderWatcher:
+    # polls input_dir and encrypts new or changed files into output_dir,
+    # a file is only picked up once its size and mtime hold for one interval
+    def __init__(
+        self,
+        input_dir: str | Path,
+        output_dir: str | Path,
+        state_path: str | Path | None = None,
+        interval: float = DEFAULT_INTERVAL,
+        max_workers: int = utilities.MAX_WORKERS,
+        suite: str = DEFAULT_SUITE,
+        catalog=None,
+    ):
+        self.input_dir = Path(input_dir).resolve()
+        self.output_dir = Path(output_dir).resolve()
+        self.state_path = Path(state_path or self.output_dir / STATE_FILE_NAME)
+        self.interval = interval
+        self.max_workers = max_workers
+        self.suite = suite
+        self.catalog = catalog
+
+        self.encryptor = Encryptor()
+        # one engine for the watcher, its buffers are kept per worker thread
+        self.engine = utilities.PixelEngine(utilities.BufferedRandomPadding())
+        self.state = self._load_state()
+        # stats from the previous scan, a file must match them to settle
+        self._previous_scan = {}
+
+    def _load_state(self) -> dict[str, WatchEntry]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.exception(f"Watch State Error: {e}")
+            return {}
+
+        if data.get("version") != STATE_VERSION:
+            logger.warning("Watch state version mismatch, starting fresh.")
+            return {}
+
+        return {path: WatchEntry(*entry) for path, entry in data["files"].items()}
+
+    def _save_state(self):
+        data = {
+            "version": STATE_VERSION,
+            "files": {path: list(entry) for path, entry in self.state.items()},
+        }
+        utilities.ResultSaver(self.state_path, fsync=True).save_result(
+            json.dumps(data, indent=1)
+        )
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        stats = {}
+
+        for path in self.input_dir.rglob("*"):
+            # never encrypt our own output or hidden and partial files
+            if path.name.startswith(".") or self.output_dir in path.parents:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                stats[path.relative_to(self.input_dir).as_posix()] = (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                )
+
+        return stats
+
+    def _bundle_path(self, relative_path: str) -> Path:
+        # mirrors the input tree, a changed file replaces its old bundle
+        return self.output_dir / f"{relative_path}.zip"
+
+    def _encrypt_one(self, relative_path: str, size: int, mtime_ns: int):
+        path = self.input_dir / relative_path
+        data = utilities.read_file(path)
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        previous = self.state.get(relative_path)
+        if previous is not None and previous.sha256 == sha256:
+            # touched, not changed, only the stats are refreshed
+            entry = WatchEntry(size, mtime_ns, sha256, previous.bundle)
+            return entry, WatchResult(path, Path(previous.bundle), "SKIPPED", "")
+
+        mime_type = mimetypes.guess_type(path.name)[0] or ""
+        # the previous bundle stays if this fails, the file is retried next scan
+        bundle_path = self.encryptor.encrypt_to_bundle(
+            data,
+            self._bundle_path(relative_path),
+            path.name,
+            mime_type,
+            suite=self.suite,
+            engine=self.engine,
+            catalog=self.catalog,
+        )
+
+        entry = WatchEntry(size, mtime_ns, sha256, str(bundle_path))
+        return entry, WatchResult(path, bundle_path, "OK", "Encrypted.")
+
+    def _pending(self, stats: dict[str, tuple[int, int]]) -> list[str]:
+        pending = []
+
+        for relative_path, (size, mtime_ns) in stats.items():
+            entry = self.state.get(relative_path)
+            if entry is not None and (entry.size, entry.mtime_ns) == (size, mtime_ns):
+                continue
+            # still being written, wait for the next scan
+            if self._previous_scan.get(relative_path) != (size, mtime_ns):
+                continue
+            pending.append(relative_path)
+
+        return pending
+
+    def poll_once(self) -> list[WatchResult]:
+        stats = self._scan()
+        pending = self._pending(stats)
+        self._previous_scan = stats
+        results = []
+
+        # files removed from the input are forgotten, their bundles are kept
+        removed = [path for path in self.state if path not in stats]
+        for relative_path in removed:
+            del self.state[relative_path]
+
+        if pending:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._encrypt_one, path, *stats[path]): path
+                    for path in pending
+                }
+
+                for future in as_completed(futures):
+                    relative_path = futures[future]
+                    try:
+                        entry, result = future.result()
+                    except Exception as e:
+                        logger.exception(f"Watch Encrypt Error: {e}")
+                        path = self.input_dir / relative_path
+                        message = str(e) or type(e).__name__
+                        results.append(WatchResult(path, None, "FAILED", message))
+                    else:
+                        self.state[relative_path] = entry
+                        results.append(result)
+
+        if pending or removed:
+            self._save_state()
+
+        return results
+
+    def run(self, stop_event: threading.Event | None = None):
+        stop_event = stop_event or threading.Event()
+        logger.info("Watching %s every %ss.", self.input_dir, self.interval)
+
+        while not stop_event.is_set():
+            for result in self.poll_once():
+                logger.info("%s %s %s", result.status, result.path.name, result.message)
+                yield result
+            stop_event.wait(self.interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Encrypt new or changed files from a folder into bundles."
+    )
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--workers", type=int, default=utilities.MAX_WORKERS)
+    parser.add_argument("--state", default=None)
+    parser.add_argument("--suite", choices=list(SUITES), default=DEFAULT_SUITE)
+    parser.add_argument(
+        "--catalog", action="store_true", help="record bundles in the catalog"
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="encrypt what is there, then exit"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    configure_profiling(args)
+
+    watcher = FolderWatcher(
+        args.input_dir,
+        args.output_dir,
+        state_path=args.state,
+        interval=args.interval,
+        max_workers=args.workers,
+        suite=args.suite,
+        catalog=CipherCatalog() if args.catalog else None,
+    )
+
+    if args.once:
+        # the first scan only records stats, the second one settles them
+        watcher.poll_once()
+        time.sleep(args.interval)
+        for result in watcher.poll_once():
+            print(f"{result.status:>8} {result.path} {result.message}")
+        return
+
+    print(f"Watching {watcher.input_dir}, bundles go to {watcher.output_dir}")
+    try:
+        for result in watcher.run():
+            print(f"{result.status:>8} {result.path} {result.message}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()